@@ -7,12 +7,12 @@ from gui_utils import GuiUtils
 
 
 class AdditionalInfoGUI(GuiUtils):
-    def __init__(self, title, mal_id, base64_image_data):
+    def __init__(self, title, mal_id, image_hash, cache_backend="json"):
         super().__init__(__file__)
-        self.generator = ConfigGenerator()
+        self.generator = ConfigGenerator(cache_backend=cache_backend)
         self.title = title
         self.mal_id = mal_id
-        self.base64_image_data = base64_image_data
+        self.image_hash = image_hash
         self.info_titles = [
             "Url",
             "Source",
@@ -33,6 +33,7 @@ class AdditionalInfoGUI(GuiUtils):
         text_color = self.get_color("text_color")
         title_font = ("calibri", 16)
         self.top = tk.Toplevel(bg=bg_color)
+        self.bind_theme(self.top, bg="background_color")
         self.top.geometry(self.get_geometry())
         self.top.title("Additional information")
         self.top.wm_protocol("WM_DELETE_WINDOW", self.on_close)
@@ -44,19 +45,23 @@ class AdditionalInfoGUI(GuiUtils):
         body_frame = tk.Frame(self.top, bg=bg_color)
         header_frame.pack()
         body_frame.pack()
+        self.bind_theme(header_frame, bg="background_color")
+        self.bind_theme(body_frame, bg="background_color")
 
         self.title_text = tk.Text(
             header_frame, wrap="word", height=2, bd=0, font=title_font, bg=bg_color, fg=text_color
         )
         self.replace_widget_text(self.title_text, f"{self.title}\n-")
         self.title_text.pack(pady=10)
+        self.bind_theme(self.title_text, bg="background_color", fg="text_color")
 
         padx = 15
         pady = 15
-        image = self.get_image_data(self.base64_image_data, 320, 500)
+        image = self.get_image_data(self.image_hash, 320, 500)
         self.img_label = tk.Label(body_frame, bg=bg_color, image=image)
         self.img_label.image = image
         self.img_label.pack(side=tk.LEFT, padx=padx, pady=pady)
+        self.bind_theme(self.img_label, bg="background_color")
 
         info_frame = tk.Frame(body_frame, bg=bg_color)
         info_frame.pack(side=tk.RIGHT, padx=(0, padx), pady=pady, fill=tk.BOTH)
@@ -64,6 +69,8 @@ class AdditionalInfoGUI(GuiUtils):
         info_table_frame.pack(side=tk.TOP)
         info_free_text_frame = tk.Frame(info_frame, bg=bg_color)
         info_free_text_frame.pack(side=tk.TOP, pady=(20, 0))
+        for frame in (info_frame, info_table_frame, info_free_text_frame):
+            self.bind_theme(frame, bg="background_color")
 
         first_column_width = max([len(title) for title in self.info_titles]) + 2
         second_column_width = 40
@@ -83,6 +90,8 @@ class AdditionalInfoGUI(GuiUtils):
             self.replace_widget_text(data_text_widget, "-")
             data_text_widget.grid(row=i, column=1, **label_grid_config)
             self.text_widgets_dict[info_title] = data_text_widget
+            self.bind_theme(header_label, bg="background_color", fg="text_color")
+            self.bind_theme(data_text_widget, bg="background_color", fg="text_color")
 
         height = 20 - len(self.info_titles)
         width = first_column_width + second_column_width
@@ -98,6 +107,7 @@ class AdditionalInfoGUI(GuiUtils):
             borderwidth=0,
         )
         self.synopsis_text_widget.pack()
+        self.bind_theme(self.synopsis_text_widget, bg="background_color", fg="text_color")
 
     def update_gui(self):
         self.top.title("Additional information (Loading...)")
@@ -117,8 +127,13 @@ class AdditionalInfoGUI(GuiUtils):
                 url = value
                 text_widget.bind("<ButtonRelease-1>", lambda e: webbrowser.open(url, new=0, autoraise=True))
                 text_widget.config(fg="blue", cursor="hand2")
-        if info.get("base64_image_data"):
-            image = self.get_image_data(info["base64_image_data"], 320, 500)
+                self.unbind_theme(text_widget, "fg")
+        if info.get("image_hash"):
+            try:
+                image = self.get_image_data(info["image_hash"], 320, 500)
+            except:
+                print(f"Error loading image for {self.title}")
+                image = self.get_image_data(self.generator.get_default_image_hash(), 320, 500)
             self.img_label.config(image=image)
             self.img_label.image = image
         self.synopsis_text_widget.insert(tk.INSERT, info.get("synopsis", "-"))
@@ -1,38 +1,109 @@
+from startup_timer import get_startup_timer  # isort: skip
+
 import os
+import queue
 import subprocess
 import sys
 import tkinter as tk
 import webbrowser
 from functools import partial
 from threading import Thread
-from tkinter import messagebox
 
 from additional_info_gui import AdditionalInfoGUI
+from config_diff import ConfigDiff, get_row_keys
 from config_generator import ConfigGenerator
 from gui_utils import GuiUtils
+from html_extractor import configure_html_parser
+from http_client import DEFAULT_POOL_SIZE, configure_http_client
+from mal_enricher import MalEnricher
+from poll_planner import DEFAULT_GRACE, DEFAULT_TTL, configure_poll_planner
 from settings_gui import SettingsGUI
+from stats_gui import StatsGUI
+from theme_registry import get_theme_registry
+from thumbnail_cache import get_thumbnail_cache
+
+GUI_POLL_INTERVAL = 50
+BUTTON_THEME = {"bg": "button_color", "fg": "text_color", "activebackground": "background_color"}
 
 
 class AnimeWatchListGUI(GuiUtils):
     def __init__(self):
-        self.defaults = {"max_rows": 8}
+        self.defaults = {
+            "max_rows": 8,
+            "http_pool_size": DEFAULT_POOL_SIZE,
+            "refresh_engine": "threads",
+            "cache_backend": "json",
+            "html_parser": "auto",
+            "poll_grace_minutes": DEFAULT_GRACE // 60,
+            "poll_ttl_minutes": DEFAULT_TTL // 60,
+        }
         super().__init__(__file__, self.defaults)
-        self.components_methods = {key: [] for key in self.theme_color_keys}
-        self.generator = ConfigGenerator()
+        get_startup_timer().mark("imports")
+        configure_http_client(pool_size=self.get_http_pool_size())
+        configure_html_parser(self.get_html_parser())
+        configure_poll_planner(grace=self.get_poll_grace_minutes() * 60, ttl=self.get_poll_ttl_minutes() * 60)
+        self.editing = False
+        self.gui_queue = queue.Queue()
+        self.config = []
+        self.display_indices = []
+        self.elements = []
+        self.body_layout = None
+        self.generator = ConfigGenerator(
+            refresh_engine=self.get_refresh_engine(), cache_backend=self.get_cache_backend()
+        )
+        self.enricher = MalEnricher(self.generator)
         self.run()
 
     def run(self):
         self.load_theme()
         self.max_rows = self.get_max_rows()
         self.create_gui()
+        get_startup_timer().mark("window")
+        self.root.after(GUI_POLL_INTERVAL, self.process_gui_queue)
         self.on_reload()
+        get_startup_timer().mark("cached_rows")
+        self.root.after_idle(self.on_first_paint)
         self.mainloop()
 
+    def on_first_paint(self):
+        get_startup_timer().mark("first_paint")
+        get_startup_timer().report()
+
+    # Tk widgets may only be used from the main thread, so the refresh threads queue what they
+    # loaded and the main loop applies it.
+    def call_in_gui(self, func, *args):
+        self.gui_queue.put(partial(func, *args))
+
+    def process_gui_queue(self):
+        while True:
+            try:
+                func = self.gui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func()
+            except Exception as e:
+                print(f"Error updating the list: {e}")
+        self.root.after(GUI_POLL_INTERVAL, self.process_gui_queue)
+
     def add_config_to_gui(self, elements):
-        self.config = self.generator.get_config()
-        self.config = self.sort_config(self.config)
-        self.update_gui(self.config, elements)
-        self.generator.update_config(self.config)
+        config = self.generator.get_config(on_details=partial(self.call_in_gui, self.on_details_loaded, elements))
+        config = self.sort_config(config)
+        self.generator.update_config(config)
+        get_thumbnail_cache().prune()
+        self.call_in_gui(self.update_gui, config, elements)
+        if "first_refresh" not in get_startup_timer().get_marks():
+            get_startup_timer().mark("first_refresh")
+            get_startup_timer().save()
+
+    def on_details_loaded(self, elements, index, details):
+        if elements is not self.elements or index >= len(self.display_indices):
+            return
+        index = self.display_indices[index]
+        self.config[index] = details
+        for e in self.elements:
+            if e["index"] == index:
+                self.bind_row(e, index)
 
     def sort_config(self, config):
         config = sorted(config, key=lambda x: f"{x['status']} {x['title']}")
@@ -46,7 +117,7 @@ class AnimeWatchListGUI(GuiUtils):
     def create_gui(self):
         self.root = tk.Tk()
         self.root.configure(background=self.secondary_bg_color)
-        self.components_methods["secondary_background_color"].append((self.root.configure, "background"))
+        self.bind_theme(self.root, background="secondary_background_color")
         self.root.title("Anime Watch List")
         self.root.wm_protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.resizable(False, False)
@@ -56,8 +127,7 @@ class AnimeWatchListGUI(GuiUtils):
         menu = tk.Menu(self.root)
         self.root.config(menu=menu)
         options_menu = tk.Menu(menu, tearoff=0, bg=self.bg_color, fg=self.text_color)
-        self.components_methods["background_color"].append((options_menu.config, "bg"))
-        self.components_methods["text_color"].append((options_menu.config, "fg"))
+        self.bind_theme(options_menu, bg="background_color", fg="text_color")
         menu.add_cascade(label="Options", menu=options_menu)
         options_menu.add_command(label="Add to list", command=self.on_add)
         options_menu.add_command(label="Edit", command=self.on_edit)
@@ -83,40 +153,33 @@ class AnimeWatchListGUI(GuiUtils):
         }
         button_pack_config = {"side": "left", "padx": 5, "pady": 5}
         self.site_frame = tk.Frame(self.root, bg=self.secondary_bg_color)
-        self.components_methods["secondary_background_color"].append((self.site_frame.config, "bg"))
+        self.bind_theme(self.site_frame, bg="secondary_background_color")
         self.site_entry = tk.Entry(
             self.site_frame, width=60, bg=self.bg_color, fg=self.text_color, font=("calibri", 12)
         )
-        self.components_methods["background_color"].append((self.site_entry.config, "bg"))
+        self.bind_theme(self.site_entry, bg="background_color")
         self.site_entry.pack(side="left", padx=20, pady=5)
         site_add_button = tk.Button(self.site_frame, text="Add", **button_config, command=self.on_site_add)
-        self.components_methods["background_color"].append((site_add_button.config, "activebackground"))
-        self.components_methods["button_color"].append((site_add_button.config, "bg"))
-        self.components_methods["text_color"].append((site_add_button.config, "fg"))
+        self.bind_theme(site_add_button, **BUTTON_THEME)
         site_add_button.pack(**button_pack_config)
         site_cancel_button = tk.Button(self.site_frame, text="Cancel", **button_config, command=self.on_site_cancel)
-        self.components_methods["background_color"].append((site_cancel_button.config, "activebackground"))
-        self.components_methods["button_color"].append((site_cancel_button.config, "bg"))
-        self.components_methods["text_color"].append((site_cancel_button.config, "fg"))
+        self.bind_theme(site_cancel_button, **BUTTON_THEME)
         site_cancel_button.pack(**button_pack_config)
 
         self.edit_frame = tk.Frame(self.root, bg=self.secondary_bg_color)
-        self.components_methods["secondary_background_color"].append((self.edit_frame.config, "bg"))
+        self.bind_theme(self.edit_frame, bg="secondary_background_color")
         button_pack_config = {"side": "left", "padx": 15}
         save_button = tk.Button(self.edit_frame, text="Save", **button_config, command=self.on_edit_save)
-        self.components_methods["background_color"].append((save_button.config, "activebackground"))
-        self.components_methods["button_color"].append((save_button.config, "bg"))
-        self.components_methods["text_color"].append((save_button.config, "fg"))
+        self.bind_theme(save_button, **BUTTON_THEME)
         save_button.pack(**button_pack_config)
         edit_cancel_button = tk.Button(self.edit_frame, text="Cancel", **button_config, command=self.on_edit_cancel)
-        self.components_methods["background_color"].append((edit_cancel_button.config, "activebackground"))
-        self.components_methods["button_color"].append((edit_cancel_button.config, "bg"))
-        self.components_methods["text_color"].append((edit_cancel_button.config, "fg"))
+        self.bind_theme(edit_cancel_button, **BUTTON_THEME)
         edit_cancel_button.pack(**button_pack_config)
         self.body_frame = tk.Frame(self.root, bg=self.secondary_bg_color)
 
     def create_body_frame(self, config):
         body_frame = tk.Frame(self.root, bg=self.secondary_bg_color)
+        self.bind_theme(body_frame, bg="secondary_background_color")
 
         if not config:
             body_frame.grid_propagate(False)
@@ -132,17 +195,15 @@ class AnimeWatchListGUI(GuiUtils):
             return body_frame, []
 
         self.canvas = tk.Canvas(body_frame, bd=0, highlightthickness=0)
-        scrollbar = tk.Scrollbar(body_frame, orient="vertical", command=self.canvas.yview)
+        self.scrollbar = tk.Scrollbar(body_frame, orient="vertical", command=self.on_scrollbar)
         scrollable_frame = tk.Frame(self.canvas, bg=self.secondary_bg_color)
-        self.components_methods["secondary_background_color"].append((scrollable_frame.config, "bg"))
+        self.bind_theme(scrollable_frame, bg="secondary_background_color")
         self.canvas.grid_propagate(False)
-        scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
         self.canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
         self.canvas.pack(side="left", fill="both", expand=True, pady=5)
 
         if len(config) > self.max_rows - 2:
-            scrollbar.pack(side="right", fill="y")
+            self.scrollbar.pack(side="right", fill="y")
             self.canvas.bind_all("<MouseWheel>", self.on_mousewheel)
 
         padx = 15
@@ -158,28 +219,22 @@ class AnimeWatchListGUI(GuiUtils):
         }
         img_width = img_height = component_config["height"] * 29
         elements = []
-        for i, c in enumerate(config):
-            element = {}
+        # Only a fixed pool of row widgets is created; scrolling rebinds them to other config indices.
+        for i in range(min(len(config), self.max_rows + 2)):
+            element = {"index": None, "rendered": {}}
             grid_config = {"pady": pady, "row": i}
-            image = self.get_image_data(c["image"]["base64_data"], img_width, img_height)
-            img_button = tk.Button(scrollable_frame, image=image, border=0, command=partial(self.on_image_button, i))
-            img_button.image = image
+            img_button = tk.Button(scrollable_frame, border=0)
             img_button.grid(**grid_config, padx=padx, column=0)
             element["img_button"] = img_button
             element["img_width"] = img_width
             element["img_height"] = img_height
 
-            title_button = tk.Button(
-                scrollable_frame,
-                text=self.trim_text(c["title"], title_width),
-                **component_config,
-                width=title_width,
-            )
+            title_button = tk.Button(scrollable_frame, **component_config, width=title_width)
             title_button.grid(**grid_config, column=1)
             element["title_button"] = title_button
             element["title_width"] = title_width
 
-            ep_button = tk.Button(scrollable_frame, text=f'#{c["ep"]}', **component_config, width=5, anchor="w")
+            ep_button = tk.Button(scrollable_frame, **component_config, width=5, anchor="w")
             ep_button.grid(**grid_config, column=2)
             element["ep_button"] = ep_button
 
@@ -199,16 +254,21 @@ class AnimeWatchListGUI(GuiUtils):
             watch_button.grid(**grid_config, padx=padx, column=3)
             element["watch_button"] = watch_button
 
-            remove_button = tk.Button(
-                scrollable_frame, text="Remove", **main_button_config, command=partial(self.on_remove_button, i)
-            )
+            remove_button = tk.Button(scrollable_frame, text="Remove", **main_button_config)
             element["remove_button"] = remove_button
 
-            element["marked_for_deletion"] = False
-            element["bg_color"] = self.bg_color
+            self.bind_theme(title_button, bg="background_color", fg="text_color")
+            self.bind_theme(ep_button, bg="background_color", fg="text_color")
+            self.bind_theme(ep_entry, fg="text_color")
+            self.bind_theme(watch_button, **BUTTON_THEME)
+            self.bind_theme(remove_button, **BUTTON_THEME)
 
             elements.append(element)
 
+        self.elements = elements
+        self.first_index = 0
+        self.row_states = self.create_row_states(config)
+        self.bind_rows()
         self.canvas.update_idletasks()
         row_height = (
             max(
@@ -230,42 +290,144 @@ class AnimeWatchListGUI(GuiUtils):
         self.site_frame["height"] = row_height
         self.edit_frame["height"] = row_height
         self.row_count = min(self.max_rows, len(config), self.row_count)
-        self.canvas.config(width=row_width, height=row_height * self.row_count, yscrollincrement=row_height)
+        self.canvas.config(width=row_width, height=row_height * self.row_count)
+        self.update_scrollbar()
         return body_frame, elements
 
-    def update_gui(self, config, elements):
-        if len(config) != len(elements):
-            raise Exception("config and elements must be of the same length")
+    def create_row_states(self, config):
+        return [self.create_row_state() for _ in config]
+
+    def create_row_state(self):
+        return {"marked_for_deletion": False, "ep_entry_text": None}
 
-        for i in range(len(config)):
-            c = config[i]
-            e = elements[i]
+    def update_gui(self, config, elements):
+        if elements is not self.elements:
+            return
+        self.apply_config(config)
+        self.enricher.start(self.config)
+
+    # Only the differences to the rows on screen are applied: the row states follow their show when it
+    # moves, the list stays scrolled where it was, and only the rows that now show another show or
+    # changed fields are bound again.
+    def apply_config(self, config):
+        diff = ConfigDiff(self.config, config, self.generator.get_cache_key)
+        self.row_states = [
+            self.row_states[old_index] if old_index is not None else self.create_row_state()
+            for old_index in diff.old_indices
+        ]
+        self.config = config
+        if diff.is_empty():
+            return
+        affected = set(diff.inserted) | set(diff.changed) | {new_index for _, new_index in diff.moved}
+        self.first_index = min(self.first_index, max(0, len(self.config) - self.row_count))
+        for i, e in enumerate(self.elements):
+            index = self.first_index + i
+            if index >= len(self.config):
+                self.unbind_row(e)
+            elif index in affected or e["index"] != index:
+                self.bind_row(e, index)
+        self.update_scrollbar()
+
+    def get_body_layout(self, config):
+        colors = (self.bg_color, self.secondary_bg_color, self.button_color, self.text_color)
+        return self.max_rows, min(len(config), self.max_rows + 2), len(config) > self.max_rows - 2, colors
+
+    def bind_rows(self):
+        for i, e in enumerate(self.elements):
+            index = self.first_index + i
+            if index < len(self.config):
+                self.bind_row(e, index)
+            else:
+                self.unbind_row(e)
+
+    def unbind_row(self, e):
+        if self.editing and e["index"] is not None and e["index"] < len(self.row_states):
+            self.row_states[e["index"]]["ep_entry_text"] = e["ep_entry"].get()
+        e["index"] = None
+
+    # Every widget of a row remembers what it was last configured with and is only configured again
+    # when that changes, so rebinding a row to the same data costs no Tk calls.
+    def bind_row(self, e, index):
+        self.unbind_row(e)
+        e["index"] = index
+        c = self.config[index]
+        state = self.row_states[index]
+        rendered = e["rendered"]
+        if rendered.get("img_button") != (index, c["image"]["hash"]):
             try:
-                image = self.get_image_data(c["image"]["base64_data"], e["img_width"], e["img_height"])
+                image = self.get_image_data(c["image"]["hash"], e["img_width"], e["img_height"])
             except:
                 print(f"Error loading image for {c['title']}")
-                self.config[i]["image"]["url"] = ""
-                self.config[i]["image"]["base64_data"] = self.generator.get_default_image_base64_data()
-                image = self.get_image_data(self.config[i]["image"]["base64_data"], e["img_width"], e["img_height"])
-            e["img_button"].config(image=image)
+                c["image"]["url"] = ""
+                c["image"]["hash"] = self.generator.get_default_image_hash()
+                image = self.get_image_data(c["image"]["hash"], e["img_width"], e["img_height"])
+            e["img_button"].config(image=image, command=partial(self.on_image_button, index))
             e["img_button"].image = image
-            title = f"[{c['status']}] {c['title']}" if c["status"] else c["title"]
+            rendered["img_button"] = (index, c["image"]["hash"])
+        title = f"[{c['status']}] {c['title']}" if c["status"] else c["title"]
+        color = self.get_row_color(e, state["marked_for_deletion"])
+        if rendered.get("title_button") != (index, title, color, c["myanimelist_url"]):
             e["title_button"].config(
                 text=self.trim_text(title, e["title_width"]),
-                command=partial(self.on_open_page, i, c["myanimelist_url"]),
+                bg=color,
+                command=partial(self.on_open_page, index, c["myanimelist_url"]),
             )
+            rendered["title_button"] = (index, title, color, c["myanimelist_url"])
+        if rendered.get("ep_button") != (index, c["ep"], color, c["current_url"]):
             e["ep_button"].config(
-                text=f'#{c["ep"]}', command=partial(self.on_open_page, i, c["current_url"], close=True)
+                text=f'#{c["ep"]}', bg=color, command=partial(self.on_open_page, index, c["current_url"], close=True)
             )
-            state = ("disabled", "normal")[bool(c["next_ep_url"])]
+            rendered["ep_button"] = (index, c["ep"], color, c["current_url"])
+        watch_state = ("disabled", "normal")[bool(c["next_ep_url"])]
+        if rendered.get("watch_button") != (index, watch_state, c["next_url"]):
             e["watch_button"].config(
-                state=state, command=partial(self.on_open_page, i, c["next_url"], update_config=True, close=True)
+                state=watch_state,
+                command=partial(self.on_open_page, index, c["next_url"], update_config=True, close=True),
             )
+            rendered["watch_button"] = (index, watch_state, c["next_url"])
+        if rendered.get("remove_button") != index:
+            e["remove_button"].config(command=partial(self.on_remove_button, index))
+            rendered["remove_button"] = index
+        if self.editing:
+            ep_entry_text = self.row_states[index]["ep_entry_text"]
+            e["ep_entry"].delete(0, "end")
+            e["ep_entry"].insert(0, c["ep"] if ep_entry_text is None else ep_entry_text)
+
+    # Rows marked for deletion are taken out of the theme, so switching themes doesn't paint over the
+    # marking; the other rows follow it and are bound with the color that was applied last.
+    def get_row_color(self, e, marked_for_deletion):
+        if marked_for_deletion:
+            self.unbind_theme(e["title_button"], "bg")
+            self.unbind_theme(e["ep_button"], "bg")
+            return "orange red"
+        self.bind_theme(e["title_button"], bg="background_color")
+        self.bind_theme(e["ep_button"], bg="background_color")
+        return get_theme_registry().get_color("background_color", self.bg_color)
+
+    def scroll_rows(self, diff):
+        max_first_index = max(0, len(self.config) - self.row_count)
+        self.first_index = max(0, min(self.first_index + diff, max_first_index))
+        self.bind_rows()
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        if not self.config:
+            return
+        first = self.first_index / len(self.config)
+        last = min(1, (self.first_index + self.row_count) / len(self.config))
+        self.scrollbar.set(first, last)
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_rows(round(float(value) * len(self.config)) - self.first_index)
+        elif action == "scroll":
+            self.scroll_rows(int(value) * (self.row_count if unit == "pages" else 1))
 
     def update_canvas_rows(self, diff):
         if len(self.config) >= self.max_rows and self.row_count + diff <= self.max_rows:
             self.row_count += diff
             self.canvas["height"] = self.row_height * self.row_count
+            self.scroll_rows(0)
 
     def is_valid_url(self, text):
         return (
@@ -295,9 +457,12 @@ class AnimeWatchListGUI(GuiUtils):
         self.site_frame.grid_forget()
 
     def on_edit_save(self):
-        for i, e in reversed(list(enumerate(self.elements))):
-            ep = e["ep_entry"].get()
-            if e["marked_for_deletion"]:
+        for e in self.elements:
+            if e["index"] is not None:
+                self.row_states[e["index"]]["ep_entry_text"] = e["ep_entry"].get()
+        for i, state in reversed(list(enumerate(self.row_states))):
+            ep = self.config[i]["ep"] if state["ep_entry_text"] is None else state["ep_entry_text"]
+            if state["marked_for_deletion"]:
                 del self.config[i]
             elif ep != self.config[i]["ep"]:
                 new_url = self.generator.update_url_episode_number(self.config[i]["current_ep_url"], ep)
@@ -310,27 +475,62 @@ class AnimeWatchListGUI(GuiUtils):
         self.on_edit_cancel()
 
     def on_edit_cancel(self):
+        self.editing = False
         self.update_canvas_rows(1)
         self.edit_frame.grid_forget()
+        for state in self.row_states:
+            state["marked_for_deletion"] = False
+            state["ep_entry_text"] = None
         for e in self.elements:
+            e["rendered"].clear()
             e["ep_entry"].grid_forget()
             e["ep_button"]["state"] = "normal"
             e["remove_button"].grid_forget()
-            e["title_button"]["bg"] = e["bg_color"]
-            e["ep_button"]["bg"] = e["bg_color"]
-            e["marked_for_deletion"] = False
+            color = self.get_row_color(e, False)
+            e["title_button"]["bg"] = color
+            e["ep_button"]["bg"] = color
 
     def on_reload(self):
+        self.enricher.stop()
         self.load_theme()
         self.max_rows = self.get_max_rows()
-        self.row_count = sys.maxsize
-        body_frame, elements = self.create_body_frame(self.generator.get_skeleton_config())
-        body_frame.grid(row=1)
-        self.body_frame.destroy()
-        self.body_frame = body_frame
-        self.elements = elements
+        skeleton_config = self.keep_shown_rows(self.generator.get_skeleton_config())
+        config = self.sort_config(skeleton_config)
+        # Entries arrive in the order of config.txt, while the rows are sorted.
+        positions = {id(c): i for i, c in enumerate(config)}
+        self.display_indices = [positions[id(c)] for c in skeleton_config]
+        body_layout = self.get_body_layout(config)
+        if self.elements and body_layout == self.body_layout:
+            # A new list for the same widgets, so a refresh still running for the previous reload is ignored.
+            self.elements = list(self.elements)
+            self.apply_config(config)
+        else:
+            self.row_count = sys.maxsize
+            self.config = config
+            body_frame, elements = self.create_body_frame(self.config)
+            body_frame.grid(row=1)
+            self.body_frame.destroy()
+            self.body_frame = body_frame
+            get_theme_registry().prune()
+            self.elements = elements
+            self.body_layout = body_layout
         Thread(target=self.add_config_to_gui, args=(self.elements,)).start()
 
+    # Cached rows don't know which shows just got a new episode, and rows that are not cached, e.g. failed
+    # ones, only show "Loading...". Rows that are still on the same episode keep what they were shown
+    # with, so they stay as and where they are until the refresh is done.
+    def keep_shown_rows(self, config):
+        get_cache_key = self.generator.get_cache_key
+        shown = {key: c for key, c in zip(get_row_keys(self.config, get_cache_key), self.config)}
+        for i, (key, c) in enumerate(zip(get_row_keys(config, get_cache_key), config)):
+            if key not in shown:
+                continue
+            if not c["loaded_from_cache"] and shown[key]["current_ep_url"] == c["current_ep_url"]:
+                config[i] = dict(shown[key])
+            elif shown[key]["ep"] == c["ep"]:
+                c["weight"] = shown[key]["weight"]
+        return config
+
     def load_theme(self):
         self.bg_color = self.get_color("background_color")
         self.secondary_bg_color = self.get_color("secondary_background_color")
@@ -338,20 +538,19 @@ class AnimeWatchListGUI(GuiUtils):
         self.text_color = self.get_color("text_color")
 
     def on_stats(self):
-        stats = self.generator.get_stats()
-        stats = "\n".join([f'{k.capitalize().replace("_", " ")}: {v}' for k, v in stats.items()])
-        messagebox.showinfo("Stats", stats)
+        StatsGUI(self.generator)
 
     def on_remove_cache(self):
         self.generator.remove_cache()
 
     def on_close(self):
+        self.enricher.stop()
         self.set_geometry(self.root.geometry())
         self.root.destroy()
 
     def on_mousewheel(self, event):
         if str(self.root.focus_get()) == ".":
-            self.canvas.yview_scroll(-1 * (event.delta // 120), "units")
+            self.scroll_rows(-1 * (event.delta // 120))
 
     def on_open_page(self, index, url, update_config=False, close=False):
         if not self.is_valid_url(url):
@@ -378,44 +577,35 @@ class AnimeWatchListGUI(GuiUtils):
     def on_edit(self):
         if not self.elements:
             return
+        self.editing = True
         self.edit_frame.grid(row=2, pady=20)
-        self.update_canvas_rows(-1)
         for i, e in enumerate(self.elements):
-            e["ep_entry"].delete(0, "end")
-            e["ep_entry"].insert(0, self.config[i]["ep"])
             e["ep_entry"].grid(row=i, column=2)
             e["ep_button"]["state"] = "disabled"
             e["remove_button"].grid(row=i, column=3)
+        self.update_canvas_rows(-1)
+        self.bind_rows()
 
     def on_remove_button(self, index):
-        color = self.elements[index]["bg_color"] if self.elements[index]["marked_for_deletion"] else "orange red"
-        self.elements[index]["title_button"]["bg"] = color
-        self.elements[index]["ep_button"]["bg"] = color
-        self.elements[index]["marked_for_deletion"] = not self.elements[index]["marked_for_deletion"]
+        state = self.row_states[index]
+        state["marked_for_deletion"] = not state["marked_for_deletion"]
+        for e in self.elements:
+            if e["index"] == index:
+                color = self.get_row_color(e, state["marked_for_deletion"])
+                e["rendered"].clear()
+                e["title_button"]["bg"] = color
+                e["ep_button"]["bg"] = color
 
     def on_image_button(self, index):
         AdditionalInfoGUI(
             self.config[index]["title"],
             self.config[index]["mal_id"],
-            self.config[index]["image"]["base64_data"],
+            self.config[index]["image"]["hash"],
+            cache_backend=self.get_cache_backend(),
         )
 
     def on_settings(self):
-        for element in self.elements:
-            self.components_methods["background_color"].append((element["title_button"].config, "bg"))
-            self.components_methods["background_color"].append((element["ep_button"].config, "bg"))
-            self.components_methods["background_color"].append((element["watch_button"].config, "activebackground"))
-            self.components_methods["background_color"].append((element["remove_button"].config, "activebackground"))
-            self.components_methods["button_color"].append((element["watch_button"].config, "bg"))
-            self.components_methods["button_color"].append((element["remove_button"].config, "bg"))
-            self.components_methods["secondary_background_color"].append((self.body_frame.config, "bg"))
-            self.components_methods["text_color"].append((element["title_button"].config, "fg"))
-            self.components_methods["text_color"].append((element["ep_button"].config, "fg"))
-            self.components_methods["text_color"].append((element["watch_button"].config, "fg"))
-            self.components_methods["text_color"].append((element["remove_button"].config, "fg"))
-            self.components_methods["text_color"].append((element["ep_entry"].config, "fg"))
-
-        self.settings_gui = SettingsGUI(self.components_methods)
+        self.settings_gui = SettingsGUI()
 
     def mainloop(self):
         tk.mainloop()
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import sys
+import threading
+
+from config_generator import CONFIG_DIR, REFRESH_ENGINES, ConfigGenerator
+from entry_store import CACHE_BACKENDS
+from html_extractor import HTML_PARSERS, configure_html_parser
+from http_client import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, configure_http_client
+from mal_enricher import MalEnricher
+from poll_planner import DEFAULT_GRACE, DEFAULT_TTL, configure_poll_planner
+from watcher import (
+    DEFAULT_INTERVAL,
+    EVENTS_FILEPATH,
+    DesktopNotificationSink,
+    FileEventSink,
+    Watcher,
+)
+
+SETTINGS_FILEPATH = os.path.join(CONFIG_DIR, "anime_watch_list.json")
+OUTPUT_FORMATS = ["json", "ndjson"]
+
+
+class AnimeWatchListCLI:
+    def __init__(self, args):
+        self.args = args
+        self.settings = self.read_settings()
+        self.lock = threading.Lock()
+        self.output = None
+
+    def read_settings(self):
+        try:
+            with open(SETTINGS_FILEPATH, "r") as f:
+                return json.load(f)
+        except:
+            return {}
+
+    def get_setting(self, key, default):
+        value = getattr(self.args, key)
+        return value if value is not None else self.settings.get(key, default)
+
+    def write_line(self, data):
+        with self.lock:
+            self.output.write(f"{json.dumps(data)}\n")
+            self.output.flush()
+
+    def on_details(self, index, details):
+        self.write_line({"index": index, "entry": details})
+
+    def enrich(self, generator, config):
+        if self.args.enrich and not self.args.cache_only:
+            MalEnricher(generator, batch_pause=0).run(config)
+
+    def get_event_sinks(self):
+        sinks = [self.write_line]
+        if self.args.events_file:
+            sinks.append(FileEventSink(self.args.events_file).emit)
+        if self.args.notify:
+            sinks.append(DesktopNotificationSink().emit)
+        return sinks
+
+    def watch(self, generator):
+        interval = self.get_setting("watch_interval_minutes", DEFAULT_INTERVAL // 60) * 60
+        watcher = Watcher(
+            generator, interval, self.get_event_sinks(), after_refresh=lambda config: self.enrich(generator, config)
+        )
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            watcher.stop()
+
+    def run(self):
+        concurrency = self.args.concurrency
+        configure_http_client(
+            pool_size=concurrency or self.settings.get("http_pool_size", DEFAULT_POOL_SIZE), timeout=self.args.timeout
+        )
+        configure_html_parser(self.get_setting("html_parser", "auto"))
+        configure_poll_planner(
+            grace=self.get_setting("poll_grace_minutes", DEFAULT_GRACE // 60) * 60,
+            ttl=self.get_setting("poll_ttl_minutes", DEFAULT_TTL // 60) * 60,
+        )
+        generator = ConfigGenerator(
+            refresh_engine=self.get_setting("refresh_engine", "threads"),
+            cache_backend=self.get_setting("cache_backend", "json"),
+            max_workers=concurrency,
+        )
+        if self.args.clear_all_backoff:
+            generator.clear_backoff()
+        for url in self.args.clear_backoff or []:
+            generator.clear_backoff(url)
+        self.output = open(self.args.output, "w") if self.args.output else sys.stdout
+        try:
+            if self.args.watch:
+                self.watch(generator)
+            elif self.args.format == "ndjson":
+                config = generator.get_config(on_details=self.on_details, cache_only=self.args.cache_only)
+                self.enrich(generator, config)
+                self.write_line({"stats": generator.get_stats()})
+            else:
+                config = generator.get_config(cache_only=self.args.cache_only)
+                self.enrich(generator, config)
+                json.dump({"entries": config, "stats": generator.get_stats()}, self.output, indent=4)
+                self.output.write("\n")
+        finally:
+            if self.output is not sys.stdout:
+                self.output.close()
+        if self.args.timings:
+            generator.export_timings(self.args.timings)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the anime watch list without the GUI.")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="json", help="output format")
+    parser.add_argument("-o", "--output", help="write the output to this file instead of stdout")
+    parser.add_argument("-c", "--concurrency", type=int, help="number of parallel fetches and pooled connections")
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT, help="HTTP timeout in seconds")
+    parser.add_argument("--cache-only", action="store_true", help="only read cached entries, never hit the network")
+    parser.add_argument(
+        "--enrich", action="store_true", help="look up missing MyAnimeList ids, episode counts and schedules"
+    )
+    parser.add_argument("--refresh-engine", choices=REFRESH_ENGINES, help="refresh engine to use")
+    parser.add_argument("--cache-backend", choices=CACHE_BACKENDS, help="entry cache backend to use")
+    parser.add_argument("--html-parser", choices=HTML_PARSERS, help="HTML parser backend to use")
+    parser.add_argument("--poll-grace-minutes", type=int, help="check a show this long after its scheduled air time")
+    parser.add_argument("--poll-ttl-minutes", type=int, help="check shows without a known schedule this often")
+    parser.add_argument(
+        "--clear-backoff", action="append", metavar="URL", help="retry this failing URL now (can be repeated)"
+    )
+    parser.add_argument("--clear-all-backoff", action="store_true", help="retry all failing URLs now")
+    parser.add_argument(
+        "--watch", action="store_true", help="keep running, refresh periodically and print new episodes as NDJSON"
+    )
+    parser.add_argument("--watch-interval-minutes", type=int, help="time between refreshes in watch mode")
+    parser.add_argument(
+        "--events-file",
+        nargs="?",
+        const=EVENTS_FILEPATH,
+        help=f"in watch mode, also append the new episode events to this file (default: {EVENTS_FILEPATH})",
+    )
+    parser.add_argument("--notify", action="store_true", help="in watch mode, also show a desktop notification")
+    parser.add_argument("--timings", help="write the per-entry and per-phase timings as JSON to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    AnimeWatchListCLI(parse_args()).run()
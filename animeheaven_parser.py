@@ -1,34 +1,37 @@
 import re
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
-
+from html_extractor import get_soup
+from http_client import HttpRequest
 from parser_utils import ParserUtils
 
 BASE_URL = "https://animeheaven.me/"
 EP_URL_PATTERN = re.compile("&episode=(\\d+(\\.\\d+)?)$")
 EP_TITLE_PATTERN = re.compile(" Episode (\\d+(\\.\\d+)?)$")
+EPISODE_PAGE_SELECTORS = [("h1", {})]
+MAIN_PAGE_SELECTORS = [("a", {"class": "ac3"}), ("div", {"class": "infotitle"}), ("img", {"class": "posterimg"})]
 
 
 class AnimeheavenParser(ParserUtils):
+    DOMAINS = ["animeheaven"]
+
     def __init__(self):
         super().__init__()
 
-    def extend_details(self, url, details):
+    def extend_details_steps(self, url, details):
         next_ep_url_from_cache = details.get("next_ep_url")
         details["ep"] = self.get_ep_from_url(url)
         if details["episodes"] == details["ep"]:
             details["status"] = self.STATUSES["finished"]
         if self.should_fetch_details_online(details):
             try:
-                ep, main_url = self.get_main_url(url)
-                details = self.extend_details_from_main_page(ep, main_url, details)
+                ep, main_url = yield from self.get_main_url(url)
+                details = yield from self.extend_details_from_main_page(ep, main_url, details)
                 if ep == "0" and not details.get("next_ep_url"):
                     details["status"] = self.STATUSES["not_aired"]
                 details["loaded_from_cache"] = False
-            except:
-                details = self.get_unsupported_url_info(url, self.STATUSES["failed"])
+            except Exception as e:
+                details = self.get_unsupported_url_info(url, self.STATUSES["failed"], e)
         if details.get("next_ep_url") != next_ep_url_from_cache:
             details["weight"] = 1
         return {**self.base_info, **details}
@@ -44,8 +47,8 @@ class AnimeheavenParser(ParserUtils):
         elif "episode.php" not in url:
             raise Exception(f"Invalid animeheaven url: {url}")
         try:
-            response = requests.get(url, allow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
-            soup = BeautifulSoup(response.text, "html.parser")
+            response = yield HttpRequest(url, raise_for_status=True)
+            soup = get_soup(response.text, *EPISODE_PAGE_SELECTORS)
             h1 = soup.find("h1")
             relative_url = h1.find("a").attrs["href"]
             ep_match = re.search(EP_TITLE_PATTERN, h1.text)
@@ -59,8 +62,8 @@ class AnimeheavenParser(ParserUtils):
         details["ep"] = ep
         details["current_ep_url"] = f"{url}&episode={ep}"
         details["current_url"] = details["current_ep_url"]
-        response = requests.get(url, allow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = yield HttpRequest(url, raise_for_status=True)
+        soup = get_soup(response.text, *MAIN_PAGE_SELECTORS)
         ep_classes = soup.find_all("a", {"class": "ac3"})
         found = False
         for ep_class in ep_classes:
@@ -88,7 +91,7 @@ class AnimeheavenParser(ParserUtils):
         if not details.get("image").get("url"):
             details["image"] = {}
             details["image"]["url"] = soup.find("img", {"class": "posterimg"})["src"]
-            details["image"]["base64_data"] = self.get_image_base64_data(details["image"]["url"])
+            details["image"]["hash"] = yield from self.get_image_hash_steps(details["image"]["url"])
 
         if details.get("episodes", "") == details["ep"]:
             details["status"] = self.STATUSES["finished"]
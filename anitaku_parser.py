@@ -1,15 +1,27 @@
 import os
 import re
 
-import requests
-from bs4 import BeautifulSoup
-
+from html_extractor import get_soup
+from http_client import HttpRequest
 from parser_utils import ParserUtils
 
 ALLOWED_DOMAINS = ["gogoanime", "gogoanimes", "anitaku"]
+COVER_SELECTOR = (None, {"itemprop": "image"})
+EPISODE_PAGE_SELECTORS = [
+    ("div", {"class": "anime-info"}),
+    ("div", {"class": "anime_video_body_episodes_r"}),
+    COVER_SELECTOR,
+]
+CATEGORY_PAGE_SELECTORS = [
+    ("div", {"class": "anime_info_body_bg"}),
+    ("div", {"class": "anime_video_body"}),
+    COVER_SELECTOR,
+]
 
 
 class AnitakuParser(ParserUtils):
+    DOMAINS = ALLOWED_DOMAINS
+
     def __init__(self):
         super().__init__()
         url_reg = f"https:\\/\\/.*(?:{'|'.join(ALLOWED_DOMAINS)}).*.[a-z]+"
@@ -17,7 +29,7 @@ class AnitakuParser(ParserUtils):
         self.url_reg = re.compile(f"^{url_reg}/.*-episode-(\\d+(-\\d+)?)$")
         self.cache_key_sub_reg = re.compile("-episode-\\d+(-\\d+)?")
 
-    def extend_details(self, url, details):
+    def extend_details_steps(self, url, details):
         next_ep_url_from_cache = details.get("next_ep_url")
         category_match = re.match(self.url_category_reg, url)
         episode_match = re.match(self.url_reg, url)
@@ -36,13 +48,13 @@ class AnitakuParser(ParserUtils):
             details["status"] = self.STATUSES["finished"]
         elif self.should_fetch_details_online(details):
             try:
-                update_method(url, details)
+                yield from update_method(url, details)
                 details["loaded_from_cache"] = False
-            except:
-                details = self.get_unsupported_url_info(url, self.STATUSES["failed"])
+            except Exception as e:
+                details = self.get_unsupported_url_info(url, self.STATUSES["failed"], e)
 
-        if not details["image"]["base64_data"]:
-            details["image"]["base64_data"] = self.get_image_base64_data(details["image"]["url"])
+        if not details["image"].get("hash"):
+            details["image"]["hash"] = yield from self.get_image_hash_steps(details["image"]["url"])
             details["loaded_from_cache"] = False
         if details.get("next_ep_url") != next_ep_url_from_cache:
             details["weight"] = 1
@@ -51,9 +63,9 @@ class AnitakuParser(ParserUtils):
         return {**self.base_info, **details}
 
     def update_with_episode_page_info(self, url, details):
-        response = requests.get(url, allow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
+        response = yield HttpRequest(url, raise_for_status=True)
         url = response.url
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = get_soup(response.text, *EPISODE_PAGE_SELECTORS)
         title = soup.find("div", {"class": "anime-info"}).a.text
         cover_url = soup.find(itemprop="image").get("content")
         myanimelist_url = self.build_myanimelist_url(title)
@@ -68,8 +80,8 @@ class AnitakuParser(ParserUtils):
         details["image"]["url"] = cover_url
 
     def update_with_category_page_info(self, url, details):
-        response = requests.get(url, allow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = yield HttpRequest(url, raise_for_status=True)
+        soup = get_soup(response.text, *CATEGORY_PAGE_SELECTORS)
         title = soup.find("div", {"class": "anime_info_body_bg"}).h1.text
         cover_url = soup.find(itemprop="image").get("content")
         myanimelist_url = self.build_myanimelist_url(title, mal_id=details.get("mal_id"))
@@ -0,0 +1,112 @@
+import time
+from urllib.parse import urlsplit
+
+from requests.compat import chardet
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from host_scheduler import THROTTLED_STATUS_CODES
+from http_client import (
+    CHUNK_SIZE,
+    MAX_ATTEMPTS,
+    HttpResponse,
+    ResponseTooLargeError,
+    check_content_length,
+    get_http_client,
+    get_retry_after,
+)
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+def is_aiohttp_available():
+    return aiohttp is not None
+
+
+class AsyncHttpClient:
+    def __init__(self, http_client=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.http_client = http_client or get_http_client()
+        self.max_concurrency = max_concurrency
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.http_client.headers)
+        return self
+
+    async def __aexit__(self, *args):
+        await self.session.close()
+
+    async def send(self, request):
+        key = self.http_client.get_flight_key(request)
+        response = await self.http_client.single_flight.do_async(key, lambda: self.send_once(request))
+        if request.raise_for_status:
+            response.raise_for_status()
+        return response
+
+    async def send_once(self, request):
+        lookup = self.http_client.lookup_cache(request)
+        if lookup.response is not None:
+            return lookup.response
+        response = await self.fetch(request.url, request.params, lookup.headers, request.timeout, request.max_bytes)
+        return self.http_client.handle_response(request, lookup, response)
+
+    async def fetch(self, url, params=None, headers=None, timeout=None, max_bytes=None):
+        host = urlsplit(url).hostname
+        for _ in range(MAX_ATTEMPTS):
+            await self.acquire(host)
+            start_time = time.monotonic()
+            status_code = retry_after = error = None
+            try:
+                response = await self.fetch_once(url, params, headers, timeout, max_bytes)
+                status_code, retry_after = response.status_code, get_retry_after(response.headers)
+            except ResponseTooLargeError as e:
+                status_code = e.status_code
+                raise
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self.http_client.release(host, start_time, status_code, retry_after, error)
+            if response.status_code not in THROTTLED_STATUS_CODES:
+                break
+        return response
+
+    async def acquire(self, host):
+        if self.http_client.scheduler is not None:
+            await self.http_client.scheduler.acquire_async(host)
+
+    async def fetch_once(self, url, params=None, headers=None, timeout=None, max_bytes=None):
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.http_client.timeout)
+        async with self.session.get(
+            self.http_client.rewrite_url(url),
+            params=params,
+            headers=headers,
+            timeout=client_timeout,
+            allow_redirects=True,
+        ) as response:
+            response_headers = CaseInsensitiveDict(response.headers)
+            if max_bytes is None:
+                content = await response.read()
+                # Decode the same way requests does so both engines produce identical text.
+                encoding = get_encoding_from_headers(response_headers) or chardet.detect(content)["encoding"]
+            else:
+                content = await self.read_content(response, response_headers, max_bytes)
+                encoding = get_encoding_from_headers(response_headers)
+            url = self.http_client.restore_url(str(response.url))
+            return HttpResponse(url, response.status, response_headers, content, encoding)
+
+    async def read_content(self, response, response_headers, max_bytes):
+        check_content_length(response_headers, max_bytes, response.url, response.status)
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResponseTooLargeError(f"Response larger than {max_bytes} bytes: {response.url}", response.status)
+            chunks.append(chunk)
+        return b"".join(chunks)
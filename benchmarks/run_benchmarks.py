@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from stub_server import ROOT_DIR, StubSiteServer, build_config_lines, get_url_rewrites
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+# revalidate keeps the warm caches but treats every cached page as stale, so each one is requested
+# again with If-None-Match and answered with a 304 by the stub.
+VARIANTS = ["cold", "warm", "revalidate"]
+RESULT_COLUMNS = [
+    "size",
+    "variant",
+    "entries",
+    "failed",
+    "wall_time",
+    "p50",
+    "p95",
+    "requests",
+    "not_modified",
+    "peak_rss_mb",
+]
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def get_peak_rss_mb():
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes everywhere else.
+    return round(peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_refresh(args):
+    sys.path.insert(0, ROOT_DIR)
+    from config_generator import ConfigGenerator
+    from html_extractor import configure_html_parser
+    from http_client import configure_http_client
+    from poll_planner import get_poll_planner
+    from refresh_timings import get_percentile
+
+    class TimedConfigGenerator(ConfigGenerator):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.latencies = {}
+
+        def get_details(self, index, url, on_details=None):
+            start_time = time.perf_counter()
+            super().get_details(index, url, on_details)
+            self.latencies[index] = time.perf_counter() - start_time
+
+        async def get_details_async(self, index, url, async_client, on_details=None):
+            start_time = time.perf_counter()
+            await super().get_details_async(index, url, async_client, on_details)
+            self.latencies[index] = time.perf_counter() - start_time
+
+    http_client = configure_http_client(url_rewrites=get_url_rewrites(args.port))
+    configure_html_parser(args.html_parser)
+    if args.variant == "revalidate":
+        get_poll_planner().clear()
+        http_client.response_cache.default_ttl = 0
+        http_client.response_cache.host_ttls = {}
+    generator = TimedConfigGenerator(refresh_engine=args.refresh_engine, cache_backend=args.cache_backend)
+    start_time = time.perf_counter()
+    config = generator.get_config()
+    wall_time = time.perf_counter() - start_time
+    latencies = list(generator.latencies.values())
+    stats = generator.get_stats()
+    result = {
+        "entries": len(config),
+        "failed": stats["failed"],
+        "wall_time": round(wall_time, 3),
+        "p50": round(get_percentile(latencies, 50), 4) if latencies else None,
+        "p95": round(get_percentile(latencies, 95), 4) if latencies else None,
+        "peak_rss_mb": get_peak_rss_mb(),
+        "http_cache_hits": stats["http_cache_hits"],
+        "http_cache_misses": stats["http_cache_misses"],
+    }
+    print(json.dumps(result))
+
+
+def prepare_workdir(workdir, size):
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(os.path.join(workdir, "configs"))
+    os.makedirs(os.path.join(workdir, "images"))
+    shutil.copy(os.path.join(ROOT_DIR, "images", "image-not-found.png"), os.path.join(workdir, "images"))
+    with open(os.path.join(workdir, "configs", "config.txt"), "w") as f:
+        f.write("".join(f"{line}\n" for line in build_config_lines(size)))
+
+
+def run_variant(args, server, workdir, variant):
+    server.reset_counts()
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--child",
+        "--variant",
+        variant,
+        "--port",
+        str(server.get_port()),
+        "--refresh-engine",
+        args.refresh_engine,
+        "--cache-backend",
+        args.cache_backend,
+        "--html-parser",
+        args.html_parser,
+    ]
+    process = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise Exception(f"Benchmark run failed:\n{process.stderr}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["requests"], result["requests_per_host"] = server.get_counts()
+    result["not_modified"] = server.get_not_modified_count()
+    return result
+
+
+def print_row(values):
+    print(" ".join(f"{str(value):>12}" for value in values), flush=True)
+
+
+def run_benchmarks(args):
+    server = StubSiteServer(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        page_bytes=args.page_kb * 1024,
+        seed=args.seed,
+    ).start()
+    base_dir = args.workdir or tempfile.mkdtemp(prefix="anime_watch_list_bench_")
+    results = []
+    print_row(RESULT_COLUMNS)
+    try:
+        for size in args.sizes:
+            workdir = os.path.join(base_dir, f"{args.refresh_engine}-{size}")
+            prepare_workdir(workdir, size)
+            for variant in VARIANTS:
+                result = {
+                    "size": size,
+                    "variant": variant,
+                    "refresh_engine": args.refresh_engine,
+                    **run_variant(args, server, workdir, variant),
+                }
+                results.append(result)
+                print_row(result[column] for column in RESULT_COLUMNS)
+    finally:
+        server.stop()
+        if not args.workdir and not args.keep:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=4)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ConfigGenerator.get_config against a local stub site.")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_SIZES)
+    parser.add_argument("--refresh-engine", choices=["threads", "asyncio"], default="threads")
+    parser.add_argument("--cache-backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--html-parser", choices=["auto", "lxml", "html.parser"], default="auto")
+    parser.add_argument("--latency", type=float, default=50, help="stub response latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=20, help="uniform latency jitter in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="status code of the injected errors")
+    parser.add_argument("--page-kb", type=int, default=64, help="approximate size of the stub HTML pages")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the jitter and error injection")
+    parser.add_argument("--workdir", help="directory for the benchmark configs, kept after the run")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary benchmark directory")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        run_refresh(args)
+    else:
+        run_benchmarks(args)
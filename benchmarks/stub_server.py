@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COVER_IMAGE_FILEPATH = os.path.join(ROOT_DIR, "images", "image-not-found.png")
+STUB_HOSTS = ["hianime.nz", "animeheaven.me", "anitaku.bz", "api.jikan.moe", "img.stub.test"]
+IMAGE_BASE_URL = "https://img.stub.test/covers"
+ANIME_ID_OFFSET = 100000
+MIN_EPISODES = 12
+SITE_KINDS = ["hianime", "animeheaven", "animeheaven_episode", "anitaku", "anitaku_category"]
+
+HIANIME_PAGE_PATTERN = re.compile(r"^/hianime\.nz/(?:watch/)?bench-show-(\d+)-\d+$")
+HIANIME_EPISODES_PATTERN = re.compile(r"^/hianime\.nz/ajax/v2/episode/list/(\d+)$")
+ANIMEHEAVEN_ANIME_PATTERN = re.compile(r"^b(\d+)$")
+ANIMEHEAVEN_EPISODE_PATTERN = re.compile(r"^b(\d+)e(\d+)$")
+ANITAKU_EPISODE_PATTERN = re.compile(r"^/anitaku\.bz/bench-show-(\d+)-episode-(\d+)$")
+ANITAKU_CATEGORY_PATTERN = re.compile(r"^/anitaku\.bz/category/bench-show-(\d+)$")
+JIKAN_ANIME_PATTERN = re.compile(r"^/api\.jikan\.moe/v4/anime/(\d+)(?:/full)?$")
+COVER_PATTERN = re.compile(r"^/img\.stub\.test/covers/\w(\d+)\.png$")
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def get_episode_count(index):
+    return MIN_EPISODES + index % 13
+
+
+# Every other show is on its latest episode, so a refresh also has pages to poll for a new one.
+def get_current_episode(index):
+    if index % 2:
+        return get_episode_count(index)
+    return 1 + index % get_episode_count(index)
+
+
+def get_title(index):
+    return f"Bench Show {index}"
+
+
+def build_config_lines(count):
+    lines = []
+    for i in range(count):
+        kind = SITE_KINDS[i % len(SITE_KINDS)]
+        ep = get_current_episode(i)
+        if kind == "hianime":
+            lines.append(f"https://hianime.nz/bench-show-{i}-{ANIME_ID_OFFSET + i}?episode={ep}")
+        elif kind == "animeheaven":
+            lines.append(f"https://animeheaven.me/anime.php?b{i}&episode={ep}")
+        elif kind == "animeheaven_episode":
+            lines.append(f"https://animeheaven.me/episode.php?b{i}e{ep}")
+        elif kind == "anitaku":
+            lines.append(f"https://anitaku.bz/bench-show-{i}-episode-{ep}")
+        else:
+            lines.append(f"https://anitaku.bz/category/bench-show-{i}")
+    return lines
+
+
+def get_url_rewrites(port):
+    return {f"https://{host}/": f"http://127.0.0.1:{port}/{host}/" for host in STUB_HOSTS}
+
+
+class StubPages:
+    def __init__(self, page_bytes):
+        self.filler = self.build_filler(page_bytes)
+        with open(COVER_IMAGE_FILEPATH, "rb") as f:
+            self.cover_image = f.read()
+
+    def build_filler(self, page_bytes):
+        item = (
+            '<div class="flw-item"><a class="film-poster-ahref" href="/related-show-{0}">Related show {0}</a></div>\n'
+        )
+        items = []
+        size = 0
+        while size < page_bytes:
+            items.append(item.format(len(items)))
+            size += len(items[-1])
+        return f'<div class="block_area related">{"".join(items)}</div>'
+
+    def wrap(self, body):
+        return f"<!DOCTYPE html><html><head><title>Stub</title></head><body>{body}{self.filler}</body></html>"
+
+    def route(self, path, query):
+        match = HIANIME_EPISODES_PATTERN.match(path)
+        if match:
+            return "application/json", self.hianime_episodes(int(match.group(1)) - ANIME_ID_OFFSET)
+        match = HIANIME_PAGE_PATTERN.match(path)
+        if match:
+            return "text/html", self.hianime_page(int(match.group(1)))
+        if path == "/animeheaven.me/anime.php":
+            match = ANIMEHEAVEN_ANIME_PATTERN.match(query.split("&")[0])
+            if match:
+                return "text/html", self.animeheaven_anime(int(match.group(1)))
+        if path == "/animeheaven.me/episode.php":
+            match = ANIMEHEAVEN_EPISODE_PATTERN.match(query)
+            if match:
+                return "text/html", self.animeheaven_episode(int(match.group(1)), int(match.group(2)))
+        match = ANITAKU_EPISODE_PATTERN.match(path)
+        if match:
+            return "text/html", self.anitaku_episode(int(match.group(1)), int(match.group(2)))
+        match = ANITAKU_CATEGORY_PATTERN.match(path)
+        if match:
+            return "text/html", self.anitaku_category(int(match.group(1)))
+        match = JIKAN_ANIME_PATTERN.match(path)
+        if match:
+            return "application/json", json.dumps({"data": self.jikan_item(int(match.group(1)) - 1)})
+        if path == "/api.jikan.moe/v4/anime":
+            return "application/json", self.jikan_search(parse_qs(query).get("q", [""])[0])
+        match = COVER_PATTERN.match(path)
+        if match:
+            return "image/png", self.cover_image + match.group(1).encode()
+        return None
+
+    def hianime_page(self, index):
+        data = json.dumps(
+            {"anime_id": str(ANIME_ID_OFFSET + index), "mal_id": str(index + 1), "name": get_title(index)}
+        )
+        return self.wrap(
+            f'<script type="application/json" id="syncData">{data}</script>'
+            f'<div class="anime-detail"><div class="film-poster">'
+            f'<img class="film-poster-img" src="{IMAGE_BASE_URL}/h{index}.png" alt="{get_title(index)}"></div></div>'
+        )
+
+    def hianime_episodes(self, index):
+        items = "".join(
+            f'<a title="Episode {n}" class="ssl-item ep-item" data-number="{n}" data-id="{index * 1000 + n}"'
+            f' href="/watch/bench-show-{index}-{ANIME_ID_OFFSET + index}?ep={index * 1000 + n}">'
+            f'<div class="ssli-order">{n}</div></a>'
+            for n in range(1, get_episode_count(index) + 1)
+        )
+        return json.dumps(
+            {"status": True, "html": f'<div class="ss-list">{items}</div>', "totalItems": get_episode_count(index)}
+        )
+
+    def animeheaven_anime(self, index):
+        items = "".join(
+            f'<a class="ac3" href="episode.php?b{index}e{n}"><div class="watch2 bc">{n}</div></a>'
+            for n in range(get_episode_count(index), 0, -1)
+        )
+        return self.wrap(
+            f'<div class="infotitle c">{get_title(index)}</div>'
+            f'<img class="posterimg" src="{IMAGE_BASE_URL}/a{index}.png">'
+            f'<div class="linetitle2 c">{items}</div>'
+        )
+
+    def animeheaven_episode(self, index, ep):
+        return self.wrap(f'<h1><a href="anime.php?b{index}">{get_title(index)}</a> Episode {ep}</h1>')
+
+    def anitaku_episode(self, index, ep):
+        next_link = f'<a href="/bench-show-{index}-episode-{ep + 1}">Next</a>' if ep < get_episode_count(index) else ""
+        return self.wrap(
+            f'<div class="anime-info"><a href="/category/bench-show-{index}">{get_title(index)}</a></div>'
+            f'<meta itemprop="image" content="{IMAGE_BASE_URL}/t{index}.png">'
+            f'<div class="anime_video_body_episodes_r">{next_link}</div>'
+        )
+
+    def anitaku_category(self, index):
+        return self.wrap(
+            f'<div class="anime_info_body_bg"><h1>{get_title(index)}</h1></div>'
+            f'<meta itemprop="image" content="{IMAGE_BASE_URL}/t{index}.png">'
+            f'<div class="anime_video_body"><a href="#" ep_start="0" ep_end="{get_episode_count(index)}">1</a></div>'
+        )
+
+    def jikan_item(self, index):
+        return {
+            "mal_id": index + 1,
+            "url": f"https://myanimelist.net/anime/{index + 1}",
+            "images": {"jpg": {"large_image_url": f"{IMAGE_BASE_URL}/j{index}.png"}},
+            "title": get_title(index),
+            "title_english": get_title(index),
+            "titles": [{"type": "Default", "title": get_title(index)}],
+            "source": "Manga",
+            "status": "Currently Airing",
+            "episodes": get_episode_count(index),
+            "aired": {"string": "Jan 1, 2026 to ?"},
+            "score": 7.5,
+            "season": "winter",
+            "broadcast": {"day": "Saturdays", "time": "23:00", "timezone": "Asia/Tokyo"},
+            "genres": [{"name": "Action"}],
+            "synopsis": "Synthetic entry served by the benchmark stub server.",
+        }
+
+    def jikan_search(self, query):
+        match = re.search(r"(\d+)$", query)
+        return json.dumps({"data": [self.jikan_item(int(match.group(1)))] if match else []})
+
+
+class StubSiteServer:
+    def __init__(self, port=0, latency=0, jitter=0, error_rate=0, error_status=503, page_bytes=64 * 1024, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.pages = StubPages(page_bytes)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.host_request_counts = {}
+        self.not_modified_count = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.create_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    def create_handler(self):
+        stub = self
+
+        class StubRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        return StubRequestHandler
+
+    def get_port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counts(self):
+        with self.lock:
+            self.request_count = 0
+            self.host_request_counts = {}
+            self.not_modified_count = 0
+
+    def get_counts(self):
+        with self.lock:
+            return self.request_count, dict(self.host_request_counts)
+
+    def get_not_modified_count(self):
+        with self.lock:
+            return self.not_modified_count
+
+    def get_delay(self):
+        with self.lock:
+            return max(0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self):
+        with self.lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def handle(self, handler):
+        split = urlsplit(handler.path)
+        host = split.path.split("/")[1]
+        with self.lock:
+            self.request_count += 1
+            self.host_request_counts[host] = self.host_request_counts.get(host, 0) + 1
+        time.sleep(self.get_delay())
+        if self.should_fail():
+            self.respond(handler, self.error_status, "text/plain", b"injected error")
+            return
+        page = self.pages.route(split.path, split.query)
+        if page is None:
+            self.respond(handler, 404, "text/plain", b"not found")
+            return
+        content_type, body = page
+        content_type = content_type if content_type.startswith("image/") else f"{content_type}; charset=utf-8"
+        body = body if isinstance(body, bytes) else body.encode()
+        # Pages are generated the same way every time, so a hash of the body is a stable ETag and the
+        # warm runs revalidate their cached responses like they would against the real sites.
+        validators = {"ETag": f'"{hashlib.sha1(body).hexdigest()}"', "Last-Modified": LAST_MODIFIED}
+        if self.is_not_modified(handler, validators):
+            with self.lock:
+                self.not_modified_count += 1
+            self.respond(handler, 304, headers=validators)
+            return
+        self.respond(handler, 200, content_type, body, validators)
+
+    def is_not_modified(self, handler, validators):
+        if_none_match = handler.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return validators["ETag"] in [etag.strip() for etag in if_none_match.split(",")]
+        return handler.headers.get("If-Modified-Since") == validators["Last-Modified"]
+
+    def respond(self, handler, status_code, content_type=None, body=b"", headers=None):
+        handler.send_response(status_code)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        if status_code != 304:
+            handler.send_header("Content-Type", content_type)
+            handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if status_code != 304:
+            handler.wfile.write(body)
@@ -0,0 +1,43 @@
+RENDERED_FIELDS = ["title", "status", "ep", "current_url", "next_url", "next_ep_url", "myanimelist_url"]
+
+
+def get_rendered_fields(details):
+    return {**{field: details.get(field) for field in RENDERED_FIELDS}, "image": details["image"]["hash"]}
+
+
+# Rows are matched by cache key. The same show can be in the list more than once, so every
+# occurrence of a key is numbered.
+def get_row_keys(config, get_cache_key):
+    counts = {}
+    keys = []
+    for details in config:
+        key = get_cache_key(details["current_ep_url"]) or details["current_ep_url"]
+        counts[key] = counts.get(key, 0) + 1
+        keys.append((key, counts[key]))
+    return keys
+
+
+class ConfigDiff:
+    def __init__(self, old_config, new_config, get_cache_key):
+        old_indices = {key: i for i, key in enumerate(get_row_keys(old_config, get_cache_key))}
+        self.old_indices = []
+        self.inserted = []
+        self.moved = []
+        self.changed = {}
+        for new_index, key in enumerate(get_row_keys(new_config, get_cache_key)):
+            old_index = old_indices.pop(key, None)
+            self.old_indices.append(old_index)
+            if old_index is None:
+                self.inserted.append(new_index)
+                continue
+            if old_index != new_index:
+                self.moved.append((old_index, new_index))
+            old_fields = get_rendered_fields(old_config[old_index])
+            new_fields = get_rendered_fields(new_config[new_index])
+            changed_fields = [field for field, value in new_fields.items() if old_fields[field] != value]
+            if changed_fields:
+                self.changed[new_index] = changed_fields
+        self.removed = sorted(old_indices.values())
+
+    def is_empty(self):
+        return not (self.inserted or self.removed or self.moved or self.changed)
@@ -1,50 +1,53 @@
+import base64
 import concurrent.futures
-import json
 import os
 import re
 import time
+from copy import deepcopy
 from datetime import datetime
-from urllib.parse import urlparse
-
-import requests
-from pytz import timezone
-
-from animeheaven_parser import AnimeheavenParser
-from anitaku_parser import AnitakuParser
-from generic_parser import GenericParser
-from hianime_parser import HiAnimeParser
+from functools import partial
+
+from entry_store import create_entry_store
+from episode_index import get_episode_index
+from failure_cache import get_failure_cache
+from http_client import get_http_client
+from image_store import get_image_store
+from jikan_client import get_jikan_client
 from parser_utils import ParserUtils
+from poll_planner import get_poll_planner
+from refresh_timings import DEFAULT_TOP_N, RefreshTimings
+from single_flight import SingleFlight, normalize_url
+from url_router import get_url_router
 
-MAX_THREADS = 8
+MAX_THREADS = 32
 CONFIG_DIR = "configs"
+REFRESH_ENGINES = ["threads", "asyncio"]
 
 
 class ConfigGenerator(ParserUtils):
-    def __init__(self, config_filename="config.txt", cache_filename="cache.json"):
+    def __init__(
+        self,
+        config_filename="config.txt",
+        cache_filename="cache.json",
+        refresh_engine="threads",
+        cache_backend="json",
+        max_workers=None,
+    ):
         super().__init__()
+        self.refresh_engine = refresh_engine
+        self.max_workers = max_workers
         self.title_parentheses_reg = re.compile(r" (\(.*\))$")
         self.title_special_chars_reg = re.compile(r"[^\w\s\-_]")
         self.general_episode_reg = re.compile(r"https://.*-(episode|ep)-(\d+)")
         self.config_filepath = os.path.join(CONFIG_DIR, config_filename)
-        self.cache_filepath = os.path.join(CONFIG_DIR, cache_filename)
+        self.entry_store = create_entry_store(cache_backend, CONFIG_DIR, cache_filename)
+        self.cache = {}
+        self.unsaved_keys = set()
         self.config = []
-        self.parsers = {
-            "animeheaven": AnimeheavenParser,
-            "anitaku": AnitakuParser,
-            "hianime": HiAnimeParser,
-            "generic": GenericParser,
-        }
-
-    def read_json(self, path):
-        try:
-            with open(path, "r") as f:
-                return json.load(f)
-        except:
-            return dict()
-
-    def write_json(self, path, data):
-        with open(path, "w") as f:
-            json.dump(data, f, indent=4)
+        self.config_load_time = None
+        self.timings = RefreshTimings()
+        self.router = get_url_router()
+        self.single_flight = SingleFlight()
 
     def get_config_filepath(self):
         return self.config_filepath
@@ -55,40 +58,159 @@ class ConfigGenerator(ParserUtils):
 
     def update_config(self, config):
         config = sorted(config, key=lambda x: x["title"])
-        with open(self.config_filepath, "w") as f:
+        tmp_filepath = f"{self.config_filepath}.tmp"
+        with open(tmp_filepath, "w") as f:
             for entry in config:
                 f.write(f'{entry["current_ep_url"]}\n')
+        os.replace(tmp_filepath, self.config_filepath)
         self.save_cache()
 
     def get_urls(self):
         with open(self.config_filepath, "r") as f:
             return [line.rstrip() for line in f.readlines()]
 
-    def get_details(self, url):
-        details = self.get_details_from_cache(url)
-        details = self.parsers[self.get_domain_name(url)]().extend_details(url, details)
-        self.config.append(details)
+    def get_details(self, index, url, on_details=None):
+        timings = self.timings.start_entry(index, url)
+        details = self.get_details_from_cache(url, timings)
+        backoff_details = self.get_backoff_details(url)
+        if backoff_details is None:
+            fetch = partial(self.fetch_details, url, details, timings)
+            details = deepcopy(self.single_flight.do(normalize_url(url), fetch))
+        self.add_details(index, backoff_details or details, on_details, timings)
+
+    async def get_details_async(self, index, url, async_client, on_details=None):
+        timings = self.timings.start_entry(index, url)
+        details = self.get_details_from_cache(url, timings)
+        backoff_details = self.get_backoff_details(url)
+        if backoff_details is None:
+            fetch = partial(self.fetch_details_async, url, details, async_client, timings)
+            details = deepcopy(await self.single_flight.do_async(normalize_url(url), fetch))
+        self.add_details(index, backoff_details or details, on_details, timings)
+
+    # Lines of config.txt with the same URL are only fetched and parsed once per refresh.
+    def fetch_details(self, url, details, timings=None):
+        parser = self.router.get_parser(url)
+        details = parser.run_steps(parser.extend_details_steps(url, details), timings)
+        details = self.handle_failure(url, details)
+        self.plan_next_poll(details)
+        return details
+
+    async def fetch_details_async(self, url, details, async_client, timings=None):
+        parser = self.router.get_parser(url)
+        details = await parser.run_steps_async(parser.extend_details_steps(url, details), async_client, timings)
+        details = self.handle_failure(url, details)
+        self.plan_next_poll(details)
+        return details
+
+    # URLs that failed recently are not fetched again until their retry_at has passed. Meanwhile, and
+    # after every new failure, the entry shows its last known good data, or the failure, marked failed.
+    def get_backoff_details(self, url):
+        backoff = get_failure_cache().get_backoff(url)
+        return self.get_failed_details(url, backoff["error"]) if backoff else None
+
+    def handle_failure(self, url, details):
+        if details["status"] != self.STATUSES["failed"]:
+            get_failure_cache().record_success(url)
+        elif details.get("error"):
+            get_failure_cache().record_failure(url, details["error"])
+            return self.get_failed_details(url, details["error"])
+        return details
+
+    # Only entries that were just checked for a next episode, and did not find one, get a new due time.
+    def plan_next_poll(self, details):
+        planner = get_poll_planner()
+        url = details["current_ep_url"]
+        if not url or not planner.is_due(url) or details["status"] not in self.get_pollable_statuses():
+            return
+        if details["next_ep_url"]:
+            planner.forget(url)
+        else:
+            planner.plan(url, details["mal_id"])
+
+    def get_pollable_statuses(self):
+        return [self.STATUSES["default"], self.STATUSES["not_aired"]]
+
+    def get_failed_details(self, url, error):
+        if self.get_cached_entry(url):
+            details = self.get_details_from_cache(url)
+        else:
+            details = self.get_unsupported_url_info(url, self.STATUSES["failed"])
+        return {**details, "status": self.STATUSES["failed"], "error": error}
+
+    def get_backoff_entries(self):
+        now = time.time()
+        entries = get_failure_cache().get_entries()
+        return [
+            {**entry, "url": url, "retry_in": round(entry["retry_at"] - now)}
+            for url, entry in sorted(entries.items(), key=lambda x: x[1]["retry_at"])
+            if entry["retry_at"] > now
+        ]
+
+    def clear_backoff(self, url=None):
+        get_failure_cache().clear(url)
+
+    def add_details(self, index, details, on_details, timings=None):
+        start_time = time.perf_counter()
+        self.config[index] = details
+        if on_details:
+            try:
+                on_details(index, details)
+            except Exception as e:
+                print(f"Error streaming details for {details['title']}: {e}")
+        if timings is not None:
+            timings.record("merge", time.perf_counter() - start_time)
+            timings.finish()
+
+    def get_all_details_with_threads(self, urls, on_details=None):
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers or MAX_THREADS) as executor:
+            futures = [executor.submit(self.get_details, i, url, on_details) for i, url in enumerate(urls)]
+            concurrent.futures.wait(futures)
+
+    # The asyncio engine and aiohttp are only imported when that engine is selected.
+    async def get_all_details_async(self, urls, on_details=None):
+        import asyncio
+
+        from async_http_client import DEFAULT_MAX_CONCURRENCY, AsyncHttpClient
+
+        max_concurrency = self.max_workers or DEFAULT_MAX_CONCURRENCY
+        async with AsyncHttpClient(get_http_client(), max_concurrency=max_concurrency) as async_client:
+            tasks = [self.get_details_async(i, url, async_client, on_details) for i, url in enumerate(urls)]
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-    def get_details_from_cache(self, url):
+    def get_refresh_engine(self):
+        if self.refresh_engine != "asyncio":
+            return "threads"
+        from async_http_client import is_aiohttp_available
+
+        return "asyncio" if is_aiohttp_available() else "threads"
+
+    def get_details_from_cache(self, url, timings=None):
+        start_time = time.perf_counter()
         loaded_from_cache = True
-        cache = self.cache.get(self.get_cache_key(url), {})
+        cache = self.get_cached_entry(url) or {}
         if not cache:
             loaded_from_cache = False
-        details = {**self.base_info, **cache, "loaded_from_cache": loaded_from_cache}
+        details = deepcopy({**self.base_info, **cache, "loaded_from_cache": loaded_from_cache})
         if url != details["current_ep_url"]:
             details["current_ep_url"] = url
+            details["ep"] = self.base_info["ep"]
             details["next_ep_url"] = ""
+        if timings is not None:
+            timings.record("cache_lookup", time.perf_counter() - start_time)
         return details
 
     def update_url_episode_number(self, url, ep):
         if not ep.isdigit():
             return url
-        return self.parsers[self.get_domain_name(url)]().update_url_episode_number(url, ep)
+        return self.router.get_parser(url).update_url_episode_number(url, ep)
 
+    # Cached rows can be shown right away, before any parser or network code is needed.
     def get_skeleton_config(self):
-        return [self.base_info] * len(self.get_urls())
+        return [self.get_details_from_cache(url) for url in self.get_urls()]
 
     def convert_time_timezone(self, day, time, tz1, tz2):
+        from pytz import timezone
+
         days = ["Mondays", "Tuesdays", "Wednesdays", "Thursdays", "Fridays", "Saturdays", "Sundays"]
         time = datetime.strptime(time, "%H:%M").time()
         dt = datetime.combine(datetime.now(), time)
@@ -103,49 +225,63 @@ class ConfigGenerator(ParserUtils):
             return days[days.index(day) - 1], converted_time
         return days[(days.index(day) + 1) % len(days)], converted_time
 
-    def get_additional_info(self, title, mal_id=None):
+    # The full mapped info is cached by mal_id and by filtered title, so reopening the info of a known
+    # show needs no request at all.
+    # With update_cache=False nothing is written to disk, so callers resolving many shows at once
+    # can store all the results with a single update.
+    def get_additional_info(self, title, mal_id=None, update_cache=True):
         filtered_title = self.filter_title(title)
-        url = "https://api.jikan.moe/v4/anime"
-        if mal_id:
-            url = f"https://api.jikan.moe/v4/anime/{mal_id}"
-            response = requests.request("GET", url)
-            response = response.json()["data"]
-            info = self.map_myanimelist_response(response)
-            self.cache_myanimelist_mapped_item(title, info)
+        info = get_jikan_client().get_cached_info(mal_id=mal_id, query=filtered_title)
+        if info is not None:
             return info
+        key = f"mal_id:{mal_id}" if mal_id else f"query:{filtered_title}"
+        fetch = partial(self.fetch_additional_info, title, filtered_title, mal_id, update_cache)
+        return get_jikan_client().coalesce(key, fetch)
 
-        params = {"q": filtered_title, "limit": "5"}
-        response = requests.request("GET", url, params=params)
-        response = response.json()
-        if not "data" in response:
-            return {}
+    def fetch_additional_info(self, title, filtered_title, mal_id=None, update_cache=True):
+        if mal_id:
+            info = self.map_myanimelist_response(get_jikan_client().get_anime(mal_id))
+        else:
+            info = self.search_additional_info(filtered_title)
+        if info:
+            self.cache_myanimelist_mapped_item(title, info, update_cache)
+        get_jikan_client().put_info(info, filtered_title)
+        if update_cache:
+            get_jikan_client().save()
+            get_poll_planner().save()
+        return info
+
+    def search_additional_info(self, filtered_title):
         backup_item = None
-        for item in response["data"]:
+        for item in get_jikan_client().search_anime(filtered_title):
             for title_object in item["titles"]:
                 filtered_res_title = self.filter_title(title_object["title"])
                 if filtered_title == filtered_res_title:
-                    info = self.map_myanimelist_response(item)
-                    self.cache_myanimelist_mapped_item(title, info)
-                    return info
+                    return self.map_myanimelist_response(item)
                 elif filtered_res_title in filtered_title or filtered_title in filtered_res_title:
                     backup_item = item
         if backup_item:
-            info = self.map_myanimelist_response(backup_item)
-            self.cache_myanimelist_mapped_item(title, info)
-            return info
+            return self.map_myanimelist_response(backup_item)
         return {}
 
-    def cache_myanimelist_mapped_item(self, title, item):
-        fields_to_update = {"myanimelist_url": item["url"], "episodes": item["episodes"], "mal_id": item["mal_id"]}
-        if item["image_url"]:
-            base64_image_data = self.get_image_base64_data(item["image_url"])
+    # The cover is only downloaded when the entry itself is updated. The background enrichment only needs
+    # the MAL fields, and a cover that no entry points to would be pruned from the image store anyway.
+    def cache_myanimelist_mapped_item(self, title, item, update_cache=True):
+        fields_to_update = self.get_myanimelist_fields(item)
+        if update_cache and item["image_url"]:
+            image_hash = self.get_image_hash(item["image_url"])
             image = {
                 "url": item["image_url"],
-                "base64_data": base64_image_data,
+                "hash": image_hash,
             }
-            item["base64_image_data"] = base64_image_data
+            item["image_hash"] = image_hash
             fields_to_update["image"] = image
-        self.update_cache(fields_to_update, title)
+        if update_cache:
+            self.update_cache(fields_to_update, title)
+        get_poll_planner().set_schedule(item["mal_id"], item["broadcast_schedule"])
+
+    def get_myanimelist_fields(self, item):
+        return {"myanimelist_url": item["url"], "episodes": item["episodes"], "mal_id": item["mal_id"]}
 
     def filter_title(self, title):
         title = re.sub(self.title_parentheses_reg, "", title).rstrip()
@@ -153,13 +289,10 @@ class ConfigGenerator(ParserUtils):
         return re.sub(self.title_special_chars_reg, "", title).lower()
 
     def update_cache(self, fields_to_update, title):
-        cache = self.get_cache()
-        for k, v in cache.items():
-            if v["title"] == title:
-                for k2, v2 in fields_to_update.items():
-                    cache[k][k2] = v2
-                break
-        self.write_json(self.cache_filepath, cache)
+        self.entry_store.update_by_title(title, fields_to_update)
+
+    def update_cache_by_titles(self, fields_by_title):
+        self.entry_store.update_by_titles(fields_by_title)
 
     def map_myanimelist_response(self, response):
         current_zone = "Europe/Stockholm"
@@ -192,6 +325,7 @@ class ConfigGenerator(ParserUtils):
             "genres": ", ".join(genres),
             "synopsis": self.stringify(response["synopsis"]),
             "image_url": img_url,
+            "broadcast_schedule": response["broadcast"],
         }
 
     def stringify(self, value):
@@ -201,14 +335,17 @@ class ConfigGenerator(ParserUtils):
     def save_cache(self):
         result = {}
         for e in self.config:
-            if e["status"] == self.STATUSES["failed"]:
-                continue
             key = self.get_cache_key(e["current_ep_url"])
             if not key:
                 continue
+            if e["status"] == self.STATUSES["failed"] or e["title"] == self.base_info["title"]:
+                if key in self.cache and key not in result:
+                    result[key] = self.cache[key]
+                continue
             result[key] = {
                 "title": e["title"],
                 "status": e["status"],
+                "ep": e["ep"],
                 "current_ep_url": "" if key in result else e["current_ep_url"],
                 "current_url": "" if key in result else e["current_url"],
                 "next_ep_url": "" if key in result else e["next_ep_url"],
@@ -216,32 +353,85 @@ class ConfigGenerator(ParserUtils):
                 "mal_id": e["mal_id"],
                 "myanimelist_url": e["myanimelist_url"],
                 "episodes": e["episodes"],
-                "image": {"url": e["image"]["url"], "base64_data": e["image"]["base64_data"]},
+                "image": {"url": e["image"]["url"], "hash": e["image"]["hash"]},
             }
-        self.write_json(self.cache_filepath, result)
-
-    def get_cache(self):
-        return self.read_json(self.cache_filepath)
+        changed_keys = [
+            key for key, entry in result.items() if key in self.unsaved_keys or self.cache.get(key) != entry
+        ]
+        self.entry_store.save(result, changed_keys)
+        self.cache = result
+        self.unsaved_keys = set()
+        keep_hashes = {entry["image"]["hash"] for entry in result.values()} | {self.get_default_image_hash()}
+        keep_hashes |= get_jikan_client().get_image_hashes()
+        get_image_store().prune(keep_hashes)
+
+    # Entries are looked up one by one, by their indexed cache key, and remembered as they were read,
+    # so save_cache only has to write the entries that changed since.
+    def get_cached_entry(self, url):
+        key = self.get_cache_key(url)
+        entry = self.entry_store.get(key) if key else None
+        if entry is None:
+            return None
+        if self.migrate_cached_image(entry):
+            self.unsaved_keys.add(key)
+        self.cache[key] = entry
+        return entry
+
+    def migrate_cached_image(self, entry):
+        image = entry.get("image", {})
+        if "base64_data" not in image:
+            return False
+        image_data = base64.b64decode(image.pop("base64_data"))
+        image["hash"] = get_image_store().put(image_data) if image_data else ""
+        return True
 
     def remove_cache(self):
-        if os.path.exists(self.cache_filepath):
-            os.remove(self.cache_filepath)
+        self.entry_store.clear()
+        self.cache = {}
+        self.unsaved_keys = set()
+        get_http_client().clear_cache()
+        get_episode_index().clear()
+        get_failure_cache().clear()
+        get_poll_planner().clear()
+        get_jikan_client().clear()
 
     def get_cache_key(self, url):
-        return self.parsers[self.get_domain_name(url)]().get_cache_key(url)
+        return self.router.get_cache_key(url)
 
-    def get_config(self):
+    def get_config(self, on_details=None, cache_only=False):
         start_time = time.time()
-        self.cache = self.get_cache()
-        self.config = []
-        with concurrent.futures.ThreadPoolExecutor(MAX_THREADS) as executor:
-            futures = [executor.submit(self.get_details, url) for url in self.get_urls()]
-            concurrent.futures.wait(futures)
-        self.save_cache()
-        self.update_config(self.config)
+        urls = self.get_urls()
+        self.config = [None] * len(urls)
+        self.timings = RefreshTimings()
+        get_http_client().reset_cache_stats()
+        self.single_flight.reset_stats()
+        if cache_only:
+            for i, url in enumerate(urls):
+                self.add_details(i, self.get_details_from_cache(url), on_details)
+        elif self.get_refresh_engine() == "asyncio":
+            import asyncio
+
+            asyncio.run(self.get_all_details_async(urls, on_details))
+        else:
+            self.get_all_details_with_threads(urls, on_details)
+        self.config = [details for details in self.config if details is not None]
+        if not cache_only:
+            get_http_client().flush_cache()
+            get_http_client().save_host_limits()
+            get_episode_index().save()
+            get_failure_cache().save()
+            get_poll_planner().prune(c["current_ep_url"] for c in self.config)
+            get_poll_planner().save()
+            self.update_config(self.config)
         self.config_load_time = time.time() - start_time
         return self.config
 
+    def get_timings(self, top_n=DEFAULT_TOP_N):
+        return self.timings.to_json(top_n)
+
+    def export_timings(self, filepath, top_n=DEFAULT_TOP_N):
+        self.timings.export(filepath, top_n)
+
     def get_stats(self):
         stats = {
             "total": 0,
@@ -251,12 +441,28 @@ class ConfigGenerator(ParserUtils):
             "failed": 0,
             "without_next_episode": 0,
             "config_load_time": "N/A",
+            "http_cache_hits": 0,
+            "http_cache_misses": 0,
+            "refresh_engine": self.get_refresh_engine(),
+            "host_concurrency": "N/A",
+            "in_backoff": len(self.get_backoff_entries()),
+            "waiting_for_air_time": 0,
+            "deduplicated_entries": self.single_flight.get_stats()["shared"],
+            "deduplicated_requests": get_http_client().get_dedup_stats()["shared"],
+            "deduplicated_jikan_lookups": get_jikan_client().get_dedup_stats()["shared"],
         }
-        if not self.config:
+        config = [c for c in self.config if c is not None]
+        if not config:
             return stats
-        stats["total"] = len(self.config)
+        http_cache_stats = get_http_client().get_cache_stats()
+        stats["http_cache_hits"] = http_cache_stats["hits"]
+        stats["http_cache_misses"] = http_cache_stats["misses"]
+        host_limits = get_http_client().get_host_limits()
+        if host_limits:
+            stats["host_concurrency"] = ", ".join(f'{h}={l["concurrency"]:.1f}' for h, l in host_limits.items())
+        stats["total"] = len(config)
         stats["config_load_time"] = f"{self.config_load_time: .3f}s" if self.config_load_time else "N/A"
-        for c in self.config:
+        for c in config:
             if c["loaded_from_cache"]:
                 stats["cached"] += 1
             if c["status"] == self.STATUSES["not_aired"]:
@@ -267,13 +473,10 @@ class ConfigGenerator(ParserUtils):
                 stats["failed"] += 1
             if c["status"] == self.STATUSES["default"] and not c["next_ep_url"]:
                 stats["without_next_episode"] += 1
+            if c["status"] in self.get_pollable_statuses() and not get_poll_planner().is_due(c["current_ep_url"]):
+                stats["waiting_for_air_time"] += 1
         return stats
 
-    def get_domain_name(self, url):
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.split(".")[0]
-        return domain if domain in self.parsers else "generic"
-
 
 if __name__ == "__main__":
     gen = ConfigGenerator()
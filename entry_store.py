@@ -0,0 +1,163 @@
+import json
+import os
+import sqlite3
+import threading
+
+CACHE_BACKENDS = ["json", "sqlite"]
+
+
+class JsonEntryStore:
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.loaded = None
+
+    def read_json(self, path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except:
+            return dict()
+
+    # Written to a temporary file first and then swapped in, so a GUI or CLI reading the cache while the
+    # watcher writes it never sees a half written file.
+    def write_json(self, path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+        if path == self.filepath:
+            self.loaded = (self.get_file_version(), data)
+
+    def get_file_version(self):
+        try:
+            stat = os.stat(self.filepath)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    # The entries are only parsed again when the file changed since they were last read or written.
+    def load(self):
+        version = self.get_file_version()
+        if self.loaded is None or version is None or self.loaded[0] != version:
+            self.loaded = (version, self.read_json(self.filepath))
+        return self.loaded[1]
+
+    def get(self, key):
+        return self.load().get(key)
+
+    # The whole file is written anyway, so changed_keys only tells whether there is anything to write.
+    def save(self, entries, changed_keys=None):
+        if changed_keys is not None and not changed_keys and entries.keys() == self.load().keys():
+            return
+        self.write_json(self.filepath, entries)
+
+    def update_by_title(self, title, fields_to_update):
+        self.update_by_titles({title: fields_to_update})
+
+    def update_by_titles(self, fields_by_title):
+        entries = self.load()
+        keys_by_title = {}
+        for k, v in entries.items():
+            keys_by_title.setdefault(v["title"], k)
+        for title, fields_to_update in fields_by_title.items():
+            if title in keys_by_title:
+                entries[keys_by_title[title]].update(fields_to_update)
+        self.write_json(self.filepath, entries)
+
+    def clear(self):
+        self.loaded = None
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+
+class SqliteEntryStore:
+    def __init__(self, filepath, json_filepath=None):
+        self.filepath = filepath
+        self.json_filepath = json_filepath
+        self.local = threading.local()
+        self.create_schema()
+        self.migrate_from_json()
+
+    def get_connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.filepath, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def create_schema(self):
+        with self.get_connection() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    cache_key TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    mal_id TEXT,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_title ON entries (title)")
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_mal_id ON entries (mal_id)")
+
+    def migrate_from_json(self):
+        if not self.json_filepath or not os.path.exists(self.json_filepath):
+            return
+        entries = JsonEntryStore(self.json_filepath).load()
+        with self.get_connection() as connection:
+            for key, entry in entries.items():
+                self.upsert(connection, key, entry)
+        os.replace(self.json_filepath, f"{self.json_filepath}.migrated")
+
+    def upsert(self, connection, key, entry):
+        mal_id = str(entry["mal_id"]) if entry.get("mal_id") else None
+        connection.execute(
+            """
+            INSERT INTO entries (cache_key, title, mal_id, data) VALUES (?, ?, ?, ?)
+            ON CONFLICT (cache_key) DO UPDATE SET title = excluded.title, mal_id = excluded.mal_id, data = excluded.data
+            """,
+            (key, entry["title"], mal_id, json.dumps(entry)),
+        )
+
+    def get(self, key):
+        row = self.get_connection().execute("SELECT data FROM entries WHERE cache_key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Only the rows in changed_keys are written; rows whose key is not in entries anymore are deleted.
+    def save(self, entries, changed_keys=None):
+        if changed_keys is None:
+            changed_keys = entries.keys()
+        with self.get_connection() as connection:
+            for key in changed_keys:
+                self.upsert(connection, key, entries[key])
+            connection.execute(
+                "DELETE FROM entries WHERE cache_key NOT IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(entries)),),
+            )
+
+    def update_by_title(self, title, fields_to_update):
+        self.update_by_titles({title: fields_to_update})
+
+    def update_by_titles(self, fields_by_title):
+        with self.get_connection() as connection:
+            for title, fields_to_update in fields_by_title.items():
+                row = connection.execute(
+                    "SELECT cache_key, data FROM entries WHERE title = ? LIMIT 1", (title,)
+                ).fetchone()
+                if row is None:
+                    continue
+                key, data = row
+                self.upsert(connection, key, {**json.loads(data), **fields_to_update})
+
+    def clear(self):
+        with self.get_connection() as connection:
+            connection.execute("DELETE FROM entries")
+
+
+def create_entry_store(backend, config_dir, cache_filename):
+    json_filepath = os.path.join(config_dir, cache_filename)
+    if backend == "sqlite":
+        return SqliteEntryStore(f"{os.path.splitext(json_filepath)[0]}.db", json_filepath=json_filepath)
+    return JsonEntryStore(json_filepath)
@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+from html_extractor import get_soup
+
+INDEX_FILEPATH = os.path.join("configs", "episode_index.json")
+DEFAULT_TTL = 300
+EP_ITEM_PATTERN = re.compile(r'<a\b[^>]*?\bclass="[^"]*\bep-item\b[^"]*"[^>]*>')
+EP_ITEM_ATTRIBUTE_PATTERN = re.compile(r'\b(data-number|data-id)="([^"]*)"')
+EP_ITEM_SELECTOR = ("a", {"class": "ep-item"})
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class EpisodeList:
+    def __init__(self, numbers=None, ids=None, updated_at=0):
+        self.numbers = []
+        self.ids = []
+        self.positions_by_number = {}
+        self.positions_by_id = {}
+        self.updated_at = updated_at
+        self.extend(zip(numbers or [], ids or []))
+
+    def extend(self, items):
+        for number, ep_id in items:
+            self.positions_by_number[number] = len(self.numbers)
+            self.positions_by_id[ep_id] = len(self.ids)
+            self.numbers.append(number)
+            self.ids.append(ep_id)
+
+    # The id is tried first, the number is used when the id is unknown, e.g. when it changed on the site.
+    def find(self, ep_id=None, ep_number=None):
+        if not ep_id and not ep_number:
+            return -1
+        if ep_id in self.positions_by_id:
+            return self.positions_by_id[ep_id]
+        return self.positions_by_number.get(ep_number)
+
+    def get(self, position):
+        if 0 <= position < len(self.numbers):
+            return self.numbers[position], self.ids[position]
+        return None, None
+
+    def to_json(self):
+        return {"numbers": self.numbers, "ids": self.ids, "updated_at": self.updated_at}
+
+
+class EpisodeIndex:
+    def __init__(self, filepath=INDEX_FILEPATH, ttl=DEFAULT_TTL):
+        self.filepath = filepath
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.lists = None
+        self.refreshes = {}
+        self.dirty = False
+
+    def load(self):
+        if self.lists is not None:
+            return
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except:
+            data = {}
+        self.lists = {anime_id: EpisodeList(**episode_list) for anime_id, episode_list in data.items()}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            tmp_filepath = f"{self.filepath}.tmp"
+            with open(tmp_filepath, "w") as f:
+                json.dump({anime_id: episode_list.to_json() for anime_id, episode_list in self.lists.items()}, f)
+            os.replace(tmp_filepath, self.filepath)
+            self.dirty = False
+
+    def clear(self):
+        with self.lock:
+            self.lists = {}
+            self.dirty = True
+        self.save()
+
+    def get(self, anime_id):
+        with self.lock:
+            self.load()
+            return self.lists.get(anime_id)
+
+    def is_fresh(self, episode_list):
+        return episode_list is not None and time.time() - episode_list.updated_at < self.ttl
+
+    # Concurrent lookups of the same show share one refresh: the first caller gets owner=True and
+    # must call end_refresh, also when it fails or is abandoned, everyone else waits on the returned future.
+    def begin_refresh(self, anime_id):
+        with self.lock:
+            if anime_id in self.refreshes:
+                return self.refreshes[anime_id], False
+            future = Future()
+            self.refreshes[anime_id] = future
+            return future, True
+
+    def end_refresh(self, anime_id, episode_list=None, error=None):
+        with self.lock:
+            future = self.refreshes.pop(anime_id)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(episode_list)
+
+    # The episode list only ever grows, so the markup is scanned from the last episode we already
+    # know and only the newly appended items are parsed.
+    def update(self, anime_id, html):
+        with self.lock:
+            self.load()
+            episode_list = self.lists.get(anime_id)
+        start = 0
+        if episode_list is not None and episode_list.ids:
+            start = html.find(f'data-id="{episode_list.ids[-1]}"')
+            start = html.rfind("<a", 0, start) if start >= 0 else -1
+        if start < 0 or episode_list is None:
+            episode_list, start = EpisodeList(), 0
+        items = self.parse_items(html, start)
+        if episode_list.ids and items and items[0][1] == episode_list.ids[-1]:
+            items = items[1:]
+        with self.lock:
+            episode_list.extend(items)
+            episode_list.updated_at = time.time()
+            self.lists[anime_id] = episode_list
+            self.dirty = True
+        return episode_list
+
+    def parse_items(self, html, start=0):
+        items = []
+        for match in EP_ITEM_PATTERN.finditer(html, start):
+            attributes = dict(EP_ITEM_ATTRIBUTE_PATTERN.findall(match.group(0)))
+            if "data-number" in attributes and "data-id" in attributes:
+                items.append((attributes["data-number"], attributes["data-id"]))
+        if not items and "ep-item" in html[start:]:
+            soup = get_soup(html[start:], EP_ITEM_SELECTOR)
+            items = [(a["data-number"], a["data-id"]) for a in soup.find_all("a", {"class": "ep-item"})]
+        return items
+
+
+def get_episode_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = EpisodeIndex()
+    return _index
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import threading
+import time
+
+FAILURES_FILEPATH = os.path.join("configs", "failures.json")
+BACKOFF_BASES = {"timeout": 300, "connection": 300, "http_error": 600, "parse": 1800}
+MAX_BACKOFF = 24 * 60 * 60
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# requests, aiohttp and asyncio are not imported here: an error can only come from them if they were
+# already imported by the http clients.
+def get_error_class(error):
+    requests, aiohttp, asyncio = (sys.modules.get(name) for name in ["requests", "aiohttp", "asyncio"])
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if (
+            isinstance(error, TimeoutError)
+            or (asyncio is not None and isinstance(error, asyncio.TimeoutError))
+            or (requests is not None and isinstance(error, requests.Timeout))
+        ):
+            return "timeout"
+        if requests is not None and isinstance(error, requests.HTTPError):
+            return "http_error"
+        if isinstance(error, OSError) or (aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError)):
+            return "connection"
+        error = error.__cause__ or error.__context__
+    return "parse"
+
+
+def get_error_info(error):
+    return {"class": get_error_class(error), "message": str(error)[:300]}
+
+
+class FailureCache:
+    def __init__(self, filepath=FAILURES_FILEPATH):
+        self.filepath = filepath
+        self.lock = threading.Lock()
+        self.entries = None
+        self.dirty = False
+
+    def load(self):
+        if self.entries is not None:
+            return
+        try:
+            with open(self.filepath, "r") as f:
+                self.entries = json.load(f)
+        except:
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            tmp_filepath = f"{self.filepath}.tmp"
+            with open(tmp_filepath, "w") as f:
+                json.dump(self.entries, f, indent=4)
+            os.replace(tmp_filepath, self.filepath)
+            self.dirty = False
+
+    def get_backoff(self, url):
+        with self.lock:
+            self.load()
+            entry = self.entries.get(url)
+        if entry is not None and time.time() < entry["retry_at"]:
+            return entry
+        return None
+
+    def record_failure(self, url, error):
+        now = time.time()
+        with self.lock:
+            self.load()
+            failures = self.entries.get(url, {}).get("failures", 0) + 1
+            backoff = min(MAX_BACKOFF, BACKOFF_BASES.get(error["class"], MAX_BACKOFF) * 2 ** (failures - 1))
+            self.entries[url] = {
+                "error": error,
+                "failures": failures,
+                "failed_at": now,
+                "retry_at": now + backoff,
+            }
+            self.dirty = True
+
+    def record_success(self, url):
+        with self.lock:
+            self.load()
+            if self.entries.pop(url, None) is not None:
+                self.dirty = True
+
+    def clear(self, url=None):
+        with self.lock:
+            self.load()
+            if url is None:
+                self.entries = {}
+            else:
+                self.entries.pop(url, None)
+            self.dirty = True
+        self.save()
+
+    def get_entries(self):
+        with self.lock:
+            self.load()
+            return {url: dict(entry) for url, entry in self.entries.items()}
+
+
+def get_failure_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FailureCache()
+    return _cache
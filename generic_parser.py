@@ -8,7 +8,7 @@ class GenericParser(ParserUtils):
     def __init__(self):
         super().__init__()
 
-    def extend_details(self, url, details):
+    def extend_details_steps(self, url, details):
         generic_episode_match = re.match(EP_GENERIC_PATTERN, url)
         if generic_episode_match:
             ep_text = generic_episode_match.group(1)
@@ -20,7 +20,7 @@ class GenericParser(ParserUtils):
             details["next_url"] = details["next_ep_url"]
             details["title"] = url.rstrip("/").split("/")[-1]
             details["loaded_from_cache"] = False
-            details["image"]["base64_data"] = self.get_default_image_base64_data()
+            details["image"]["hash"] = self.get_default_image_hash()
         else:
             details = self.get_unsupported_url_info(url, self.STATUSES["failed"])
         return {**self.base_info, **details}
@@ -1,12 +1,13 @@
-import base64
-import io
 import json
 import os
 from copy import deepcopy
 
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from screeninfo import get_monitors
 
+from theme_registry import get_theme_registry
+from thumbnail_cache import get_thumbnail_cache
+
 
 class GuiUtils:
     def __init__(self, filepath, defaults={}):
@@ -119,6 +120,30 @@ class GuiUtils:
     def set_max_rows(self, max_rows):
         self.settings["max_rows"] = max_rows
 
+    @load_settings
+    def get_http_pool_size(self):
+        return self.settings["http_pool_size"]
+
+    @load_settings
+    def get_refresh_engine(self):
+        return self.settings["refresh_engine"]
+
+    @load_settings
+    def get_cache_backend(self):
+        return self.settings["cache_backend"]
+
+    @load_settings
+    def get_html_parser(self):
+        return self.settings["html_parser"]
+
+    @load_settings
+    def get_poll_grace_minutes(self):
+        return self.settings["poll_grace_minutes"]
+
+    @load_settings
+    def get_poll_ttl_minutes(self):
+        return self.settings["poll_ttl_minutes"]
+
     @load_themes
     def get_current_theme(self):
         return self.current_theme
@@ -137,14 +162,24 @@ class GuiUtils:
         self.current_theme = theme_name
         self.themes_config["current"] = theme_name
 
+    def bind_theme(self, widget, **options):
+        get_theme_registry().bind(widget, **options)
+
+    def unbind_theme(self, widget, *options):
+        get_theme_registry().unbind(widget, *options)
+
+    # Applies the given colors, or the whole current theme, to every window that is open.
+    def apply_theme(self, colors=None):
+        if colors is None:
+            colors = {key: self.get_color(key) for key in self.theme_color_keys}
+        get_theme_registry().apply(colors)
+
     def add_icon(self, root):
         icon_img = ImageTk.PhotoImage(file=os.path.join("images", "icon.ico"))
         root.tk.call("wm", "iconphoto", root._w, icon_img)
 
-    def get_image_data(self, base64_image_data, width, height):
-        image_data = base64.b64decode(base64_image_data)
-        img = Image.open(io.BytesIO(image_data))
-        img = img.resize((width, height), Image.LANCZOS)
+    def get_image_data(self, image_hash, width, height):
+        img = get_thumbnail_cache().get(image_hash, width, height)
         return ImageTk.PhotoImage(img)
 
     def trim_text(self, text, max_length):
@@ -2,38 +2,40 @@ import html
 import json
 import re
 
-import requests
-from bs4 import BeautifulSoup
-
+from episode_index import get_episode_index
+from html_extractor import extract_script_json, get_soup
+from http_client import HttpRequest
 from parser_utils import ParserUtils
 
 BASE_URL = "https://hianime.nz/"
 DISPLAY_EP_URL_PATTERN = re.compile("\\?episode=(\\d+(\\.\\d+)?)$")
 EP_URL_PATTERN = re.compile("\\?ep=(\\d+)$")
+SYNC_DATA_SELECTOR = ("script", {"id": "syncData"})
+FILM_POSTER_SELECTOR = ("div", {"class": "film-poster"})
 
 
 class HiAnimeParser(ParserUtils):
+    DOMAINS = ["hianime"]
+
     def __init__(self):
         super().__init__()
 
-    def extend_details(self, url, details):
+    def extend_details_steps(self, url, details):
         next_ep_url_from_cache = details.get("next_ep_url")
         display_ep_match = DISPLAY_EP_URL_PATTERN.search(url)
         details["ep"] = display_ep_match.group(1) if display_ep_match else "0"
         if not details.get("title") or not details.get("mal_id") or not details.get("image", {}).get("url"):
             try:
-                details = self.extend_details_from_page(url, details)
+                details = yield from self.extend_details_from_page(url, details)
                 details["loaded_from_cache"] = False
-            except:
-                details = self.get_unsupported_url_info(url, self.STATUSES["failed"])
-        if not details.get("current_ep_url") or (
-            not details.get("next_ep_url") and details.get("status") != self.STATUSES["finished"]
-        ):
+            except Exception as e:
+                details = self.get_unsupported_url_info(url, self.STATUSES["failed"], e)
+        if not details.get("current_ep_url") or self.should_check_next_episode(details):
             try:
-                details = self.extend_details_with_ep_data(url, details)
+                details = yield from self.extend_details_with_ep_data(url, details)
                 details["loaded_from_cache"] = False
-            except:
-                details = self.get_unsupported_url_info(url, self.STATUSES["failed"])
+            except Exception as e:
+                details = self.get_unsupported_url_info(url, self.STATUSES["failed"], e)
         if details.get("next_ep_url") != next_ep_url_from_cache:
             details["weight"] = 1
         if details["episodes"] == details["ep"]:
@@ -44,22 +46,12 @@ class HiAnimeParser(ParserUtils):
 
     def extend_details_with_ep_data(self, url, details):
         anime_id, ep_id, ep_number = self.parse_url(url)
-        ep_list_url = f"https://hianime.nz/ajax/v2/episode/list/{anime_id}"
-        response = requests.get(ep_list_url, allow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
-        data = response.json()
-        soup = BeautifulSoup(data["html"], "html.parser")
-        ep_items = soup.find_all("a", {"class": "ep-item"})
+        episode_list = yield from self.get_episode_list_steps(anime_id, ep_id, ep_number)
         current_number, current_id, next_number, next_id = None, None, None, None
-        for ep_item in ep_items:
-            data_number = ep_item["data-number"]
-            data_id = ep_item["data-id"]
-            if data_id == ep_id or data_number == ep_number:
-                current_number = data_number
-                current_id = data_id
-            elif current_number or (not ep_number and not ep_id):
-                next_number = data_number
-                next_id = data_id
-                break
+        position = episode_list.find(ep_id, ep_number)
+        if position is not None:
+            current_number, current_id = episode_list.get(position)
+            next_number, next_id = episode_list.get(position + 1)
         details["ep"] = current_number if current_number else "0"
         details["current_ep_url"] = self.update_url_episode_number(url, current_number)
         details["current_url"] = self.update_url_number(url, current_id)
@@ -68,23 +60,53 @@ class HiAnimeParser(ParserUtils):
             details["next_url"] = self.update_url_number(url, next_id)
         return details
 
+    # Episodes are looked up in a persisted per-show index. The episode list is only requested when the
+    # index is stale and doesn't already know the episode after the current one, and config lines of the
+    # same show that need it at the same time share a single request.
+    def get_episode_list_steps(self, anime_id, ep_id, ep_number):
+        index = get_episode_index()
+        episode_list = index.get(anime_id)
+        if episode_list is not None:
+            position = episode_list.find(ep_id, ep_number)
+            if index.is_fresh(episode_list) or (position is not None and position + 1 < len(episode_list.ids)):
+                return episode_list
+        future, owner = index.begin_refresh(anime_id)
+        if not owner:
+            return (yield future)
+        episode_list, error = None, None
+        try:
+            response = yield HttpRequest(f"https://hianime.nz/ajax/v2/episode/list/{anime_id}", raise_for_status=True)
+            episode_list = index.update(anime_id, response.json()["html"])
+        except BaseException as e:
+            # Also reached when these steps are closed before the request finished, e.g. by GeneratorExit;
+            # the waiting lookups then get a regular error instead of waiting forever.
+            error = e if isinstance(e, Exception) else RuntimeError(f"Episode list refresh of {anime_id} stopped")
+            raise
+        finally:
+            index.end_refresh(anime_id, episode_list, error)
+        return episode_list
+
     def extend_details_from_page(self, url, details):
-        response = requests.get(url, allow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(response.text, "html.parser")
-        script = soup.find("script", {"id": "syncData"})
-        if script:
-            data = json.loads(script.string)
-        else:
-            raise Exception("Script with syncData not found in the page")
+        response = yield HttpRequest(url, raise_for_status=True)
+        soup = None
+        data = extract_script_json(response.text, "syncData")
+        if data is None:
+            soup = get_soup(response.text, SYNC_DATA_SELECTOR, FILM_POSTER_SELECTOR)
+            script = soup.find("script", {"id": "syncData"})
+            if script:
+                data = json.loads(script.string)
+            else:
+                raise Exception("Script with syncData not found in the page")
         details["title"] = html.unescape(data.get("name", ""))
         details["mal_id"] = data.get("mal_id")
         details["myanimelist_url"] = self.build_myanimelist_url(details["title"], mal_id=data.get("mal_id"))
         if not details.get("image").get("url"):
             try:
+                soup = soup or get_soup(response.text, FILM_POSTER_SELECTOR)
                 img_url = soup.find("div", {"class": "film-poster"}).find("img")["src"]
                 details["image"] = {}
                 details["image"]["url"] = img_url
-                details["image"]["base64_data"] = self.get_image_base64_data(details["image"]["url"])
+                details["image"]["hash"] = yield from self.get_image_hash_steps(details["image"]["url"])
             except:
                 pass
         return details
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+
+LIMITS_FILEPATH = os.path.join("configs", "host_limits.json")
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 16
+MIN_RATE = 0.5
+MAX_RATE = 50
+DEFAULT_HOST_LIMITS = {"concurrency": 4, "rate": 10}
+HOST_LIMITS = {
+    "hianime.nz": {"concurrency": 2, "rate": 4},
+    "api.jikan.moe": {"concurrency": 1, "rate": 1},
+}
+LATENCY_TOLERANCE = 2
+LATENCY_SMOOTHING = 0.2
+DECREASE_FACTOR = 0.5
+LATENCY_DECREASE_FACTOR = 0.9
+RATE_INCREASE = 0.25
+DEFAULT_RETRY_AFTER = 1
+THROTTLED_STATUS_CODES = [429, 503]
+
+
+class HostState:
+    def __init__(self, concurrency, rate):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.tokens = 1
+        self.in_flight = 0
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0
+        self.latency_baseline = None
+
+    def try_acquire(self, now):
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.concurrency):
+            return None
+        self.tokens = min(max(self.rate, 1), self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    # Latencies are compared to a moving average of the recent ones rather than to the fastest one seen,
+    # so a single fast response doesn't turn every normal one after it into a spike.
+    def on_success(self, latency):
+        if self.latency_baseline is None:
+            self.latency_baseline = latency
+        if latency > self.latency_baseline * LATENCY_TOLERANCE:
+            self.concurrency = max(MIN_CONCURRENCY, self.concurrency * LATENCY_DECREASE_FACTOR)
+        else:
+            self.concurrency = min(MAX_CONCURRENCY, self.concurrency + 1 / self.concurrency)
+            self.rate = min(MAX_RATE, self.rate + RATE_INCREASE)
+        self.latency_baseline += (latency - self.latency_baseline) * LATENCY_SMOOTHING
+
+    def on_failure(self, now, throttled=False, retry_after=None):
+        self.concurrency = max(MIN_CONCURRENCY, self.concurrency * DECREASE_FACTOR)
+        if throttled:
+            self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+            self.blocked_until = now + (retry_after or DEFAULT_RETRY_AFTER)
+
+    def to_json(self):
+        return {"concurrency": round(self.concurrency, 3), "rate": round(self.rate, 3)}
+
+
+class HostScheduler:
+    def __init__(self, limits_filepath=LIMITS_FILEPATH):
+        self.limits_filepath = limits_filepath
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.async_waiters = []
+        self.states = {}
+        self.learned_limits = self.read_limits()
+
+    def read_limits(self):
+        try:
+            with open(self.limits_filepath, "r") as f:
+                return json.load(f)
+        except:
+            return {}
+
+    def save(self):
+        with self.lock:
+            limits = {**self.learned_limits, **{host: state.to_json() for host, state in self.states.items()}}
+        os.makedirs(os.path.dirname(self.limits_filepath), exist_ok=True)
+        tmp_filepath = f"{self.limits_filepath}.tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(limits, f, indent=4)
+        os.replace(tmp_filepath, self.limits_filepath)
+
+    def get_state(self, host):
+        if host not in self.states:
+            limits = {**DEFAULT_HOST_LIMITS, **HOST_LIMITS.get(host, {}), **self.learned_limits.get(host, {})}
+            self.states[host] = HostState(limits["concurrency"], limits["rate"])
+        return self.states[host]
+
+    def acquire(self, host):
+        with self.condition:
+            while True:
+                wait = self.get_state(host).try_acquire(time.monotonic())
+                if wait == 0:
+                    return
+                self.condition.wait(timeout=wait)
+
+    async def acquire_async(self, host):
+        import asyncio
+
+        while True:
+            with self.lock:
+                wait = self.get_state(host).try_acquire(time.monotonic())
+                if wait == 0:
+                    return
+                if wait is None:
+                    loop = asyncio.get_running_loop()
+                    waiter = loop.create_future()
+                    self.async_waiters.append((loop, waiter))
+            if wait is None:
+                await waiter
+            else:
+                await asyncio.sleep(wait)
+
+    def release(self, host, latency, status_code=None, error=None, retry_after=None):
+        with self.condition:
+            state = self.get_state(host)
+            state.in_flight -= 1
+            # A request that was cancelled or interrupted only gives its slot back.
+            if status_code is None and error is None:
+                pass
+            elif error is not None or status_code >= 500 or status_code in THROTTLED_STATUS_CODES:
+                throttled = status_code in THROTTLED_STATUS_CODES
+                state.on_failure(time.monotonic(), throttled=throttled, retry_after=retry_after)
+            else:
+                state.on_success(latency)
+            self.condition.notify_all()
+            async_waiters, self.async_waiters = self.async_waiters, []
+        for loop, waiter in async_waiters:
+            loop.call_soon_threadsafe(self.wake_async_waiter, waiter)
+
+    def wake_async_waiter(self, waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def get_limits(self):
+        with self.lock:
+            return {host: state.to_json() for host, state in self.states.items()}
@@ -0,0 +1,70 @@
+import json
+import re
+from functools import lru_cache, partial
+from importlib.util import find_spec
+
+HTML_PARSERS = ["auto", "lxml", "html.parser"]
+
+_html_parser = None
+
+
+def configure_html_parser(name="auto"):
+    global _html_parser
+    if name == "auto":
+        name = "lxml" if find_spec("lxml") else "html.parser"
+    elif name == "lxml" and not find_spec("lxml"):
+        print("lxml is not installed, falling back to html.parser")
+        name = "html.parser"
+    _html_parser = name
+    return _html_parser
+
+
+def get_html_parser():
+    return _html_parser or configure_html_parser()
+
+
+# Selectors use the same (name, attrs) shape as soup.find. Only the matching tags and their
+# subtrees are built into the soup, so the rest of the page is tokenized but never turned into nodes.
+def get_soup(markup, *selectors):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    parse_only = SoupStrainer(partial(matches_any, selectors)) if selectors else None
+    return BeautifulSoup(markup, get_html_parser(), parse_only=parse_only)
+
+
+def matches_any(selectors, name, attrs=None):
+    if not isinstance(name, str):
+        name, attrs = name.name, name.attrs
+    return any(matches(selector, name, attrs or {}) for selector in selectors)
+
+
+def matches(selector, name, attrs):
+    selector_name, selector_attrs = selector
+    if selector_name is not None and selector_name != name:
+        return False
+    for key, value in selector_attrs.items():
+        actual = attrs.get(key)
+        if actual is None:
+            return False
+        if key == "class":
+            classes = actual.split() if isinstance(actual, str) else actual
+            if value not in classes and value != " ".join(classes):
+                return False
+        elif actual != value:
+            return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def get_script_pattern(script_id):
+    return re.compile(f"<script\\b[^>]*\\bid=[\"']{re.escape(script_id)}[\"'][^>]*>(.*?)</script>", re.DOTALL)
+
+
+def extract_script_json(markup, script_id):
+    match = get_script_pattern(script_id).search(markup)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
@@ -0,0 +1,338 @@
+import json
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from host_scheduler import MAX_CONCURRENCY, THROTTLED_STATUS_CODES, HostScheduler
+from response_cache import ResponseCache
+from single_flight import SingleFlight, normalize_url
+
+DEFAULT_POOL_SIZE = MAX_CONCURRENCY
+DEFAULT_TIMEOUT = 10
+MAX_ATTEMPTS = 3
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+CHUNK_SIZE = 64 * 1024
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class ResponseTooLargeError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class HttpRequest:
+    def __init__(
+        self,
+        url,
+        params=None,
+        headers=None,
+        timeout=None,
+        use_cache=True,
+        raise_for_status=False,
+        phase="http",
+        max_bytes=None,
+    ):
+        self.url = url
+        self.params = params
+        self.headers = headers
+        self.timeout = timeout
+        self.use_cache = use_cache
+        self.raise_for_status = raise_for_status
+        self.phase = phase
+        self.max_bytes = max_bytes
+
+
+class HttpResponse:
+    def __init__(self, url, status_code, headers, content, encoding=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            from requests import HTTPError
+
+            raise HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+class CacheLookup:
+    def __init__(self, key=None, entry=None, content=None, headers=None, response=None):
+        self.key = key
+        self.entry = entry
+        self.content = content
+        self.headers = headers
+        self.response = response
+
+
+class HttpClient:
+    def __init__(
+        self,
+        pool_size=DEFAULT_POOL_SIZE,
+        headers=None,
+        timeout=DEFAULT_TIMEOUT,
+        response_cache=None,
+        scheduler=None,
+        url_rewrites=None,
+    ):
+        self.pool_size = pool_size
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.timeout = timeout
+        self.response_cache = response_cache
+        self.scheduler = scheduler
+        self.url_rewrites = url_rewrites or {}
+        self.session = None
+        self.session_lock = threading.Lock()
+        self.single_flight = SingleFlight()
+
+    # requests is only imported, and the session only created, by the first request that actually
+    # goes to the network, so cache-only work never pays for them.
+    def get_session(self):
+        if self.session is None:
+            with self.session_lock:
+                if self.session is None:
+                    self.session = self.create_session()
+        return self.session
+
+    def create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        # urllib3 keeps one pool per host; pool_connections is how many host pools stay alive
+        # and pool_maxsize is how many keep-alive connections each of them holds.
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def get(self, url, params=None, headers=None, timeout=None, use_cache=True):
+        return self.send(HttpRequest(url, params=params, headers=headers, timeout=timeout, use_cache=use_cache))
+
+    # Identical requests that are already running share the response of the first one, so the same page,
+    # episode list or image needed by several entries at once is only downloaded once.
+    def send(self, request):
+        response = self.single_flight.do(self.get_flight_key(request), lambda: self.send_once(request))
+        if request.raise_for_status:
+            response.raise_for_status()
+        return response
+
+    def send_once(self, request):
+        lookup = self.lookup_cache(request)
+        if lookup.response is not None:
+            return lookup.response
+        response = self.fetch(request.url, request.params, lookup.headers, request.timeout, request.max_bytes)
+        return self.handle_response(request, lookup, response)
+
+    def get_flight_key(self, request):
+        return (normalize_url(request.url, request.params), request.use_cache)
+
+    def lookup_cache(self, request):
+        lookup = CacheLookup(headers=request.headers)
+        if not request.use_cache or self.response_cache is None:
+            return lookup
+        lookup.key = self.build_cache_key(request.url, request.params)
+        lookup.entry, lookup.content = self.response_cache.lookup(lookup.key)
+        if lookup.entry is None:
+            self.response_cache.record_miss()
+        elif self.response_cache.is_fresh(lookup.entry):
+            self.response_cache.record_hit()
+            lookup.response = self.build_cached_response(lookup.entry, lookup.content)
+        else:
+            conditional_headers = self.response_cache.get_conditional_headers(lookup.entry)
+            lookup.headers = {**(request.headers or {}), **conditional_headers}
+        return lookup
+
+    def handle_response(self, request, lookup, response):
+        if lookup.entry is not None and response.status_code == 304:
+            self.response_cache.record_hit()
+            self.response_cache.revalidated(lookup.key, response.headers)
+            response = self.build_cached_response(lookup.entry, lookup.content)
+        else:
+            if lookup.entry is not None:
+                self.response_cache.record_miss()
+            if lookup.key is not None and response.status_code == 200:
+                self.response_cache.store(
+                    lookup.key, response.url, response.headers, response.content, response.encoding
+                )
+        return response
+
+    def fetch(self, url, params=None, headers=None, timeout=None, max_bytes=None):
+        host = urlsplit(url).hostname
+        for _ in range(MAX_ATTEMPTS):
+            self.acquire(host)
+            start_time = time.monotonic()
+            status_code = retry_after = error = None
+            try:
+                response = self.get_session().get(
+                    self.rewrite_url(url),
+                    params=params,
+                    headers=headers,
+                    timeout=timeout or self.timeout,
+                    allow_redirects=True,
+                    stream=max_bytes is not None,
+                )
+                content = response.content if max_bytes is None else self.read_content(response, max_bytes)
+                status_code, retry_after = response.status_code, get_retry_after(response.headers)
+            except ResponseTooLargeError as e:
+                # The host answered fine, so an oversized body is left to the caller, not held against the host.
+                status_code = e.status_code
+                raise
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self.release(host, start_time, status_code, retry_after, error)
+            if response.status_code not in THROTTLED_STATUS_CODES:
+                break
+        return HttpResponse(
+            self.restore_url(response.url),
+            response.status_code,
+            response.headers,
+            content,
+            response.encoding or (response.apparent_encoding if max_bytes is None else None),
+        )
+
+    # Responses with a byte cap are streamed and dropped as soon as they are known to be too large,
+    # from the Content-Length header or while reading, instead of being downloaded in full.
+    def read_content(self, response, max_bytes):
+        with response:
+            check_content_length(response.headers, max_bytes, response.url, response.status_code)
+            chunks, size = [], 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResponseTooLargeError(
+                        f"Response larger than {max_bytes} bytes: {response.url}", response.status_code
+                    )
+                chunks.append(chunk)
+            return b"".join(chunks)
+
+    # url_rewrites maps URL prefixes to other prefixes, e.g. to send every site to a local stub
+    # server in the benchmarks. Hosts, cache keys and returned URLs all keep the original prefix.
+    def rewrite_url(self, url):
+        for prefix, target in self.url_rewrites.items():
+            if url.startswith(prefix):
+                return target + url[len(prefix) :]
+        return url
+
+    def restore_url(self, url):
+        for prefix, target in self.url_rewrites.items():
+            if url.startswith(target):
+                return prefix + url[len(target) :]
+        return url
+
+    def acquire(self, host):
+        if self.scheduler is not None:
+            self.scheduler.acquire(host)
+
+    def release(self, host, start_time, status_code=None, retry_after=None, error=None):
+        if self.scheduler is not None:
+            self.scheduler.release(host, time.monotonic() - start_time, status_code, error, retry_after)
+
+    def build_cache_key(self, url, params=None):
+        from requests.models import PreparedRequest
+
+        request = PreparedRequest()
+        request.prepare_url(url, params)
+        return request.url
+
+    def build_cached_response(self, entry, content):
+        headers = {"Content-Type": entry["content_type"]} if entry.get("content_type") else {}
+        return HttpResponse(entry["url"], 200, headers, content, entry.get("encoding"), from_cache=True)
+
+    def get_content(self, url, timeout=None):
+        return self.send(HttpRequest(url, timeout=timeout, use_cache=False, raise_for_status=True)).content
+
+    def flush_cache(self):
+        if self.response_cache is not None:
+            self.response_cache.flush()
+
+    def clear_cache(self):
+        if self.response_cache is not None:
+            self.response_cache.clear()
+
+    def save_host_limits(self):
+        if self.scheduler is not None:
+            self.scheduler.save()
+
+    def get_host_limits(self):
+        if self.scheduler is None:
+            return {}
+        return self.scheduler.get_limits()
+
+    def reset_cache_stats(self):
+        self.single_flight.reset_stats()
+        if self.response_cache is not None:
+            self.response_cache.reset_stats()
+
+    def get_dedup_stats(self):
+        return self.single_flight.get_stats()
+
+    def get_cache_stats(self):
+        if self.response_cache is None:
+            return {"hits": 0, "misses": 0}
+        return self.response_cache.get_stats()
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+def get_http_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(response_cache=ResponseCache(), scheduler=HostScheduler())
+    return _client
+
+
+def configure_http_client(pool_size=DEFAULT_POOL_SIZE, headers=None, timeout=DEFAULT_TIMEOUT, url_rewrites=None):
+    global _client
+    with _client_lock:
+        response_cache, scheduler = ResponseCache(), HostScheduler()
+        if _client is not None:
+            response_cache, scheduler = _client.response_cache, _client.scheduler
+            _client.close()
+        _client = HttpClient(
+            pool_size=pool_size,
+            headers=headers,
+            timeout=timeout,
+            response_cache=response_cache,
+            scheduler=scheduler,
+            url_rewrites=url_rewrites,
+        )
+    return _client
+
+
+def check_content_length(headers, max_bytes, url, status_code=None):
+    content_length = headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ResponseTooLargeError(f"Response larger than {max_bytes} bytes: {url}", status_code)
+
+
+def get_retry_after(headers):
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    if retry_after.isdigit():
+        return int(retry_after)
+    try:
+        return max(0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
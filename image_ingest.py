@@ -0,0 +1,99 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from image_store import get_image_store
+from thumbnail_cache import get_thumbnail_cache
+
+MAX_IMAGE_BYTES = 2 * 1024 * 1024
+MAX_IMAGE_PIXELS = 4096 * 4096
+ALLOWED_FORMATS = ["JPEG", "PNG", "GIF", "WEBP"]
+SIGNATURES = [b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF87a", b"GIF89a"]
+# The sizes the GUI shows covers at: the rows of the main window and the additional information window.
+VARIANT_SIZES = [(58, 58), (320, 500)]
+STORED_SIZE = (320, 500)
+JPEG_QUALITY = 85
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_ingest = None
+_ingest_lock = threading.Lock()
+
+
+class InvalidImageError(Exception):
+    pass
+
+
+def has_image_signature(data):
+    return any(data.startswith(signature) for signature in SIGNATURES) or (
+        data[:4] == b"RIFF" and data[8:12] == b"WEBP"
+    )
+
+
+# Downloaded covers are validated, shrunk to fit the largest size the GUI uses and re-encoded before
+# they are stored, and the exact sizes the GUI shows are written to the thumbnail cache right away,
+# so nothing is resized when the list is drawn. Decoding and resizing run on a small pool, so a
+# refresh of many entries never runs more of them at once than there are workers, and the asyncio
+# engine can wait for them without blocking its event loop.
+class ImageIngest:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def submit(self, data):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="image-ingest")
+        return self.executor.submit(self.ingest, data)
+
+    # Pillow is only imported once a cover is actually ingested. Without it the download is still
+    # checked for a known image signature and stored as it is.
+    def ingest(self, data):
+        if not has_image_signature(data):
+            raise InvalidImageError("Not a supported image")
+        try:
+            from PIL import Image
+        except ImportError:
+            return get_image_store().put(data)
+        img = self.decode(Image, data)
+        image_hash = get_image_store().put(self.encode(Image, img))
+        for width, height in VARIANT_SIZES:
+            get_thumbnail_cache().put(image_hash, img, width, height)
+        return image_hash
+
+    def decode(self, Image, data):
+        try:
+            img = Image.open(io.BytesIO(data))
+            if img.format not in ALLOWED_FORMATS:
+                raise InvalidImageError(f"Unsupported image format {img.format}")
+            if img.width * img.height > MAX_IMAGE_PIXELS:
+                raise InvalidImageError(f"Image too large: {img.width}x{img.height}")
+            # Lets JPEGs be decoded at a fraction of their size when they are much larger than needed.
+            img.draft("RGB", STORED_SIZE)
+            img.load()
+        except InvalidImageError:
+            raise
+        except Exception as e:
+            raise InvalidImageError(f"Invalid image: {e}") from e
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        return img.convert("RGBA" if has_alpha else "RGB")
+
+    def encode(self, Image, img):
+        img = img.copy()
+        img.thumbnail(STORED_SIZE, Image.LANCZOS)
+        output = io.BytesIO()
+        if img.mode == "RGBA":
+            img.save(output, format="PNG", optimize=True)
+        else:
+            img.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        return output.getvalue()
+
+
+def get_image_ingest():
+    global _ingest
+    if _ingest is None:
+        with _ingest_lock:
+            if _ingest is None:
+                _ingest = ImageIngest()
+    return _ingest
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import threading
+import time
+
+IMAGES_DIR = os.path.join("configs", "images")
+PRUNE_GRACE_PERIOD = 60
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class ImageStore:
+    def __init__(self, images_dir=IMAGES_DIR):
+        self.images_dir = images_dir
+
+    def put(self, image_data):
+        image_hash = hashlib.sha256(image_data).hexdigest()
+        filepath = self.get_filepath(image_hash)
+        if os.path.exists(filepath):
+            os.utime(filepath)
+        else:
+            os.makedirs(self.images_dir, exist_ok=True)
+            tmp_filepath = f"{filepath}.{threading.get_ident()}.tmp"
+            with open(tmp_filepath, "wb") as f:
+                f.write(image_data)
+            os.replace(tmp_filepath, filepath)
+        return image_hash
+
+    def get(self, image_hash):
+        with open(self.get_filepath(image_hash), "rb") as f:
+            return f.read()
+
+    def exists(self, image_hash):
+        return bool(image_hash) and os.path.exists(self.get_filepath(image_hash))
+
+    def prune(self, keep_hashes):
+        if not os.path.isdir(self.images_dir):
+            return
+        min_mtime = time.time() - PRUNE_GRACE_PERIOD
+        for filename in os.listdir(self.images_dir):
+            if filename in keep_hashes:
+                continue
+            filepath = os.path.join(self.images_dir, filename)
+            try:
+                if os.path.getmtime(filepath) < min_mtime:
+                    os.remove(filepath)
+            except OSError:
+                pass
+
+    def get_filepath(self, image_hash):
+        return os.path.join(self.images_dir, image_hash)
+
+
+def get_image_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ImageStore()
+    return _store
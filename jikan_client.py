@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+
+from http_client import HttpRequest, get_http_client
+from single_flight import SingleFlight
+
+BASE_URL = "https://api.jikan.moe/v4"
+CACHE_FILEPATH = os.path.join("configs", "jikan_cache.json")
+# Jikan allows 3 requests per second and 60 per minute.
+RATE_LIMITS = [(3, 1), (60, 60)]
+TIMEOUT = 10
+DEFAULT_TTL = 24 * 60 * 60
+FINISHED_TTL = 30 * 24 * 60 * 60
+FINISHED_STATUS = "Finished airing"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class TokenBucket:
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+
+    def get_wait_time(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class JikanClient:
+    def __init__(self, filepath=CACHE_FILEPATH, ttl=DEFAULT_TTL):
+        self.filepath = filepath
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.rate_lock = threading.Lock()
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in RATE_LIMITS]
+        self.single_flight = SingleFlight()
+        self.anime = None
+        self.queries = None
+        self.dirty = False
+
+    def load(self):
+        if self.anime is not None:
+            return
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except:
+            data = {}
+        self.anime = data.get("anime", {})
+        self.queries = data.get("queries", {})
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            tmp_filepath = f"{self.filepath}.tmp"
+            with open(tmp_filepath, "w") as f:
+                json.dump({"anime": self.anime, "queries": self.queries}, f)
+            os.replace(tmp_filepath, self.filepath)
+            self.dirty = False
+
+    def clear(self):
+        with self.lock:
+            self.anime = {}
+            self.queries = {}
+            self.dirty = True
+        self.save()
+
+    # Waits until every bucket has a token, so bursts are spread out before they reach the API
+    # instead of being answered with 429s.
+    def acquire(self):
+        with self.rate_lock:
+            while True:
+                now = time.monotonic()
+                wait_time = max(bucket.get_wait_time(now) for bucket in self.buckets)
+                if wait_time == 0:
+                    for bucket in self.buckets:
+                        bucket.tokens -= 1
+                    return
+                time.sleep(wait_time)
+
+    def get(self, path, params=None):
+        self.acquire()
+        request = HttpRequest(
+            f"{BASE_URL}{path}", params=params, timeout=TIMEOUT, use_cache=False, raise_for_status=True
+        )
+        return get_http_client().send(request).json()
+
+    def get_anime(self, mal_id):
+        return self.get(f"/anime/{mal_id}")["data"]
+
+    def search_anime(self, query, limit=5):
+        return self.get("/anime", params={"q": query, "limit": str(limit)}).get("data", [])
+
+    # Identical lookups that are already running are not sent again: later callers wait for the
+    # first one and get its result.
+    def coalesce(self, key, func):
+        return self.single_flight.do(key, func)
+
+    def get_dedup_stats(self):
+        return self.single_flight.get_stats()
+
+    def is_fresh(self, entry):
+        ttl = FINISHED_TTL if entry["info"].get("status") == FINISHED_STATUS else self.ttl
+        return time.time() - entry["cached_at"] < ttl
+
+    # Searches that matched nothing are cached as well, as an empty mal_id, so they are not repeated.
+    def get_cached_info(self, mal_id=None, query=None):
+        with self.lock:
+            self.load()
+            if not mal_id and query:
+                search = self.queries.get(query)
+                if search is None or time.time() - search["cached_at"] >= self.ttl:
+                    return None
+                if not search["mal_id"]:
+                    return {}
+                mal_id = search["mal_id"]
+            entry = self.anime.get(str(mal_id)) if mal_id else None
+        if entry is None or not self.is_fresh(entry):
+            return None
+        return dict(entry["info"])
+
+    def put_info(self, info, query=None):
+        now = time.time()
+        with self.lock:
+            self.load()
+            if info:
+                self.anime[str(info["mal_id"])] = {"info": info, "cached_at": now}
+            if query:
+                self.queries[query] = {"mal_id": str(info["mal_id"]) if info else "", "cached_at": now}
+            self.dirty = True
+
+    # Covers of the cached infos are kept in the image store as well, so they are not pruned.
+    def get_image_hashes(self):
+        with self.lock:
+            self.load()
+            return {entry["info"]["image_hash"] for entry in self.anime.values() if entry["info"].get("image_hash")}
+
+
+def get_jikan_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = JikanClient()
+    return _client
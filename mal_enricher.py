@@ -0,0 +1,69 @@
+import threading
+
+from jikan_client import get_jikan_client
+from poll_planner import get_poll_planner
+
+BATCH_SIZE = 10
+BATCH_PAUSE = 2
+START_DELAY = 5
+
+
+class MalEnricher:
+    def __init__(self, generator, batch_size=BATCH_SIZE, batch_pause=BATCH_PAUSE):
+        self.generator = generator
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # Runs after a refresh finished and is stopped as soon as the next one starts, so the Jikan
+    # lookups never compete with the refresh itself.
+    def start(self, config, delay=START_DELAY):
+        self.stop()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(config, self.stop_event, delay), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def needs_enrichment(self, details):
+        if details["status"] in [self.generator.STATUSES["failed"], self.generator.STATUSES["unsupported_url"]]:
+            return False
+        if not details["title"] or details["title"] == details["current_ep_url"]:
+            return False
+        return (
+            not details["mal_id"] or not details["episodes"] or not get_poll_planner().has_schedule(details["mal_id"])
+        )
+
+    def run(self, config, stop_event=None, delay=0):
+        stop_event = stop_event or self.stop_event
+        if stop_event.wait(delay):
+            return 0
+        entries = [details for details in config if details and self.needs_enrichment(details)]
+        fields_by_title = {}
+        for i in range(0, len(entries), self.batch_size):
+            if i and stop_event.wait(self.batch_pause):
+                break
+            for details in entries[i : i + self.batch_size]:
+                if stop_event.is_set():
+                    break
+                try:
+                    info = self.generator.get_additional_info(details["title"], details["mal_id"], update_cache=False)
+                except Exception as e:
+                    print(f"Error enriching {details['title']}: {e}")
+                    continue
+                if not info:
+                    continue
+                fields = self.generator.get_myanimelist_fields(info)
+                details.update(fields)
+                get_poll_planner().set_schedule(info["mal_id"], info["broadcast_schedule"])
+                fields_by_title[details["title"]] = fields
+        self.save(fields_by_title)
+        return len(fields_by_title)
+
+    def save(self, fields_by_title):
+        if fields_by_title:
+            self.generator.update_cache_by_titles(fields_by_title)
+        get_jikan_client().save()
+        get_poll_planner().save()
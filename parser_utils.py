@@ -1,7 +1,20 @@
-import base64
 import os
+import threading
+import time
+from concurrent.futures import Future
+from types import GeneratorType
 from urllib.parse import quote, urlsplit, urlunsplit
-from urllib.request import Request, urlopen
+
+from failure_cache import get_error_info
+from http_client import HttpRequest, get_http_client
+from image_ingest import MAX_IMAGE_BYTES, get_image_ingest
+from image_store import get_image_store
+from poll_planner import get_poll_planner
+
+DEFAULT_IMAGE_FILEPATH = os.path.join("images", "image-not-found.png")
+
+_default_image_hash = None
+_default_image_lock = threading.Lock()
 
 
 class ParserUtils:
@@ -26,23 +39,101 @@ class ParserUtils:
             "loaded_from_cache": False,
             "weight": 0,
             "episodes": None,
-            "image": {"url": "", "base64_data": self.get_image_base64_data(None)},
+            "image": {"url": "", "hash": self.get_image_hash(None)},
         }
 
-    def get_image_base64_data(self, url):
+    def extend_details(self, url, details):
+        return self.run_steps(self.extend_details_steps(url, details))
+
+    # Parsers describe their network work as generators that yield HttpRequest objects and receive
+    # the responses back, so the same parsing code can be driven by threads or by an asyncio loop.
+    # Steps may also yield a Future to wait for a result another step is producing, e.g. a shared fetch.
+    # When timings are given, the time spent inside the parser between requests is recorded as the
+    # "parse" phase, every request under its own phase ("http" or "image") and waiting on a Future as "wait".
+    def run_steps(self, steps, timings=None):
+        if not isinstance(steps, GeneratorType):
+            return steps
+        response, error = None, None
+        while True:
+            start_time = time.perf_counter()
+            try:
+                request = steps.throw(error) if error else steps.send(response)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.record_timing(timings, "parse", start_time)
+            start_time = time.perf_counter()
+            try:
+                if isinstance(request, Future):
+                    response, error = request.result(), None
+                else:
+                    response, error = get_http_client().send(request), None
+            except Exception as e:
+                response, error = None, e
+            self.record_request_timing(timings, request, start_time)
+
+    async def run_steps_async(self, steps, async_client, timings=None):
+        import asyncio
+
+        if not isinstance(steps, GeneratorType):
+            return steps
+        response, error = None, None
+        while True:
+            start_time = time.perf_counter()
+            try:
+                request = steps.throw(error) if error else steps.send(response)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.record_timing(timings, "parse", start_time)
+            start_time = time.perf_counter()
+            try:
+                if isinstance(request, Future):
+                    response, error = await asyncio.wrap_future(request), None
+                else:
+                    response, error = await async_client.send(request), None
+            except Exception as e:
+                response, error = None, e
+            self.record_request_timing(timings, request, start_time)
+
+    def record_timing(self, timings, phase, start_time, url=None):
+        if timings is not None:
+            timings.record(phase, time.perf_counter() - start_time, url)
+
+    def record_request_timing(self, timings, request, start_time):
+        if isinstance(request, Future):
+            self.record_timing(timings, "wait", start_time)
+        else:
+            self.record_timing(timings, request.phase, start_time, request.url)
+
+    def get_image_hash(self, url):
+        return self.run_steps(self.get_image_hash_steps(url))
+
+    def get_image_hash_steps(self, url):
         if url:
             try:
-                encoded_url = self.encode_url(url)
-                req = Request(encoded_url, headers={"User-Agent": "Mozilla/5.0"})
-                with urlopen(req, timeout=3) as response:
-                    return base64.b64encode(response.read()).decode("utf-8")
+                request = HttpRequest(
+                    self.encode_url(url),
+                    timeout=3,
+                    use_cache=False,
+                    raise_for_status=True,
+                    phase="image",
+                    max_bytes=MAX_IMAGE_BYTES,
+                )
+                response = yield request
+                return (yield get_image_ingest().submit(response.content))
             except:
                 pass
-        return self.get_default_image_base64_data()
+        return self.get_default_image_hash()
 
-    def get_default_image_base64_data(self):
-        with open(os.path.join("images", "image-not-found.png"), "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+    def get_default_image_hash(self):
+        global _default_image_hash
+        if _default_image_hash is None:
+            with _default_image_lock:
+                if _default_image_hash is None:
+                    with open(DEFAULT_IMAGE_FILEPATH, "rb") as f:
+                        _default_image_hash = get_image_store().put(f.read())
+        return _default_image_hash
 
     def encode_url(self, url):
         protocol, domain, path, query, fragment = urlsplit(url)
@@ -54,14 +145,26 @@ class ParserUtils:
             return f"https://myanimelist.net/anime/{mal_id}"
         return f'https://myanimelist.net/search/all?q={"%20".join(title.split(" "))}&cat=anime#anime'
 
-    def get_unsupported_url_info(self, url, status):
-        return {**self.base_info, "title": url, "status": status, "current_ep_url": url}
+    def get_unsupported_url_info(self, url, status, error=None):
+        info = {**self.base_info, "title": url, "status": status, "current_ep_url": url}
+        if error is not None:
+            info["error"] = get_error_info(error)
+        return info
 
     def should_fetch_details_online(self, details):
         return (
             not details.get("title")
             or not details.get("current_ep_url")
-            or (not details.get("next_ep_url") and details.get("status") != self.STATUSES["finished"])
+            or self.should_check_next_episode(details)
             or not details.get("myanimelist_url")
             or not details.get("image", {}).get("url")
         )
+
+    # Entries without a next episode are only checked again once the poll planner says a new
+    # episode can have aired, instead of on every reload.
+    def should_check_next_episode(self, details):
+        return (
+            not details.get("next_ep_url")
+            and details.get("status") != self.STATUSES["finished"]
+            and get_poll_planner().is_due(details.get("current_ep_url"))
+        )
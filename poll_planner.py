@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+PLAN_FILEPATH = os.path.join("configs", "poll_plan.json")
+BROADCAST_DAYS = ["Mondays", "Tuesdays", "Wednesdays", "Thursdays", "Fridays", "Saturdays", "Sundays"]
+DEFAULT_GRACE = 60 * 60
+DEFAULT_TTL = 6 * 60 * 60
+CATCH_UP_WINDOW = 2 * 24 * 60 * 60
+WEEK = 7 * 24 * 60 * 60
+
+_planner = None
+_planner_lock = threading.Lock()
+
+
+# pytz is only imported once a show with a broadcast schedule is planned.
+def get_next_air_time(schedule, after):
+    from pytz import timezone
+
+    tz = timezone(schedule["timezone"])
+    hour, minute = (int(x) for x in schedule["time"].split(":"))
+    local = datetime.fromtimestamp(after, tz).replace(tzinfo=None)
+    days_ahead = (BROADCAST_DAYS.index(schedule["day"]) - local.weekday()) % 7
+    air_time = local.replace(hour=hour, minute=minute, second=0, microsecond=0) + timedelta(days=days_ahead)
+    if tz.localize(air_time).timestamp() <= after:
+        air_time += timedelta(days=7)
+    return tz.localize(air_time).timestamp()
+
+
+def is_valid_schedule(schedule):
+    return bool(
+        schedule and schedule.get("day") in BROADCAST_DAYS and schedule.get("time") and schedule.get("timezone")
+    )
+
+
+class PollPlanner:
+    def __init__(self, filepath=PLAN_FILEPATH, grace=DEFAULT_GRACE, ttl=DEFAULT_TTL):
+        self.filepath = filepath
+        self.grace = grace
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = None
+        self.schedules = None
+        self.dirty = False
+
+    def configure(self, grace=None, ttl=None):
+        if grace is not None:
+            self.grace = grace
+        if ttl is not None:
+            self.ttl = ttl
+
+    def load(self):
+        if self.entries is not None:
+            return
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except:
+            data = {}
+        self.entries = data.get("entries", {})
+        self.schedules = data.get("schedules", {})
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            tmp_filepath = f"{self.filepath}.tmp"
+            with open(tmp_filepath, "w") as f:
+                json.dump({"entries": self.entries, "schedules": self.schedules}, f, indent=4)
+            os.replace(tmp_filepath, self.filepath)
+            self.dirty = False
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            self.schedules = {}
+            self.dirty = True
+        self.save()
+
+    def set_schedule(self, mal_id, schedule):
+        if not mal_id:
+            return
+        schedule = {k: schedule.get(k) for k in ["day", "time", "timezone"]} if is_valid_schedule(schedule) else None
+        with self.lock:
+            self.load()
+            if self.schedules.get(str(mal_id)) != schedule:
+                self.schedules[str(mal_id)] = schedule
+                self.dirty = True
+
+    def has_schedule(self, mal_id):
+        with self.lock:
+            self.load()
+            return str(mal_id) in self.schedules
+
+    def get_schedule(self, mal_id):
+        with self.lock:
+            self.load()
+            return self.schedules.get(str(mal_id)) if mal_id else None
+
+    def is_due(self, url):
+        with self.lock:
+            self.load()
+            entry = self.entries.get(url)
+        return entry is None or time.time() >= entry["due_at"]
+
+    # Called after an online check found no next episode. A show with a known broadcast schedule is
+    # not checked again before its next air time plus the grace window, except right after an episode
+    # aired, when the sites may still be catching up. Shows without a schedule fall back to the TTL.
+    def plan(self, url, mal_id=None):
+        now = time.time()
+        schedule = self.get_schedule(mal_id)
+        if schedule:
+            due_at = get_next_air_time(schedule, now) + self.grace
+            if now - get_next_air_time(schedule, now - WEEK) < CATCH_UP_WINDOW:
+                due_at = min(due_at, now + self.grace)
+        else:
+            due_at = now + self.ttl
+        with self.lock:
+            self.load()
+            self.entries[url] = {"checked_at": now, "due_at": due_at}
+            self.dirty = True
+        return due_at
+
+    def forget(self, url):
+        with self.lock:
+            self.load()
+            if self.entries.pop(url, None) is not None:
+                self.dirty = True
+
+    def prune(self, urls):
+        urls = set(urls)
+        with self.lock:
+            self.load()
+            stale = [url for url in self.entries if url not in urls]
+            for url in stale:
+                del self.entries[url]
+            self.dirty = self.dirty or bool(stale)
+
+
+def configure_poll_planner(grace=None, ttl=None):
+    planner = get_poll_planner()
+    planner.configure(grace, ttl)
+    return planner
+
+
+def get_poll_planner():
+    global _planner
+    if _planner is None:
+        with _planner_lock:
+            if _planner is None:
+                _planner = PollPlanner()
+    return _planner
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from bisect import bisect_right
+from urllib.parse import urlsplit
+
+PHASES = ["cache_lookup", "http", "wait", "parse", "image", "merge"]
+HISTOGRAM_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+DEFAULT_TOP_N = 10
+
+
+def get_percentile(values, percentile):
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(percentile / 100 * len(values)) - 1))
+    return values[index]
+
+
+def format_duration(duration):
+    return f"{duration * 1000:g}ms" if duration < 1 else f"{duration:g}s"
+
+
+def get_bucket_labels():
+    return [f"<{format_duration(bucket)}" for bucket in HISTOGRAM_BUCKETS] + [
+        f">={format_duration(HISTOGRAM_BUCKETS[-1])}"
+    ]
+
+
+class EntryTimings:
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+        self.host = urlsplit(url).hostname or ""
+        self.lock = threading.Lock()
+        self.phases = []
+        self.start_time = time.perf_counter()
+        self.total = None
+
+    def record(self, phase, duration, url=None):
+        host = urlsplit(url).hostname if url else self.host
+        with self.lock:
+            self.phases.append({"phase": phase, "host": host, "url": url, "duration": duration})
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start_time
+
+    def get_phase_totals(self):
+        totals = {}
+        with self.lock:
+            for phase in self.phases:
+                totals[phase["phase"]] = totals.get(phase["phase"], 0) + phase["duration"]
+        return totals
+
+    def to_json(self):
+        with self.lock:
+            phases = [{**phase, "duration": round(phase["duration"], 4)} for phase in self.phases]
+        return {
+            "index": self.index,
+            "url": self.url,
+            "host": self.host,
+            "total": round(self.total, 4) if self.total is not None else None,
+            "phases": phases,
+        }
+
+
+class RefreshTimings:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def start_entry(self, index, url):
+        entry = EntryTimings(index, url)
+        with self.lock:
+            self.entries[index] = entry
+        return entry
+
+    def get_entries(self):
+        with self.lock:
+            return sorted(self.entries.values(), key=lambda entry: entry.index)
+
+    def get_histograms(self):
+        durations = {}
+        for entry in self.get_entries():
+            with entry.lock:
+                for phase in entry.phases:
+                    durations.setdefault((phase["host"], phase["phase"]), []).append(phase["duration"])
+        histograms = []
+        for (host, phase), values in sorted(durations.items(), key=lambda x: (x[0][0], PHASES.index(x[0][1]))):
+            labels = get_bucket_labels()
+            buckets = {label: 0 for label in labels}
+            for value in values:
+                buckets[labels[bisect_right(HISTOGRAM_BUCKETS, value)]] += 1
+            histograms.append(
+                {
+                    "host": host,
+                    "phase": phase,
+                    "count": len(values),
+                    "total": round(sum(values), 4),
+                    "p50": round(get_percentile(values, 50), 4),
+                    "p95": round(get_percentile(values, 95), 4),
+                    "max": round(max(values), 4),
+                    "buckets": buckets,
+                }
+            )
+        return histograms
+
+    def get_slowest(self, top_n=DEFAULT_TOP_N):
+        entries = [entry for entry in self.get_entries() if entry.total is not None]
+        entries = sorted(entries, key=lambda entry: entry.total, reverse=True)[:top_n]
+        return [
+            {
+                "index": entry.index,
+                "url": entry.url,
+                "total": round(entry.total, 4),
+                "phases": {phase: round(total, 4) for phase, total in entry.get_phase_totals().items()},
+            }
+            for entry in entries
+        ]
+
+    def to_json(self, top_n=DEFAULT_TOP_N):
+        return {
+            "histograms": self.get_histograms(),
+            "slowest": self.get_slowest(top_n),
+            "entries": [entry.to_json() for entry in self.get_entries()],
+        }
+
+    def export(self, filepath, top_n=DEFAULT_TOP_N):
+        with open(filepath, "w") as f:
+            json.dump(self.to_json(top_n), f, indent=4)
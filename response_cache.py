@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+CACHE_DIR = os.path.join("configs", "http_cache")
+INDEX_FILENAME = "index.json"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 60
+HOST_TTLS = {
+    "hianime.nz": 300,
+    "animeheaven.me": 300,
+    "anitaku.bz": 300,
+    "api.jikan.moe": 3600,
+}
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, host_ttls=None, default_ttl=DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.index_filepath = os.path.join(cache_dir, INDEX_FILENAME)
+        self.max_bytes = max_bytes
+        self.host_ttls = {**HOST_TTLS, **(host_ttls or {})}
+        self.default_ttl = default_ttl
+        self.lock = threading.Lock()
+        self.entries = None
+        self.total_bytes = 0
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        if self.entries is not None:
+            return
+        try:
+            with open(self.index_filepath, "r") as f:
+                index = json.load(f)
+        except:
+            index = []
+        self.entries = OrderedDict((entry["key"], entry) for entry in index)
+        self.total_bytes = sum(entry["size"] for entry in self.entries.values())
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_filepath = f"{self.index_filepath}.tmp"
+            with open(tmp_filepath, "w") as f:
+                json.dump(list(self.entries.values()), f)
+            os.replace(tmp_filepath, self.index_filepath)
+            self.dirty = False
+
+    def clear(self):
+        with self.lock:
+            self.load()
+            for key in list(self.entries):
+                self.remove_entry(key)
+            self.dirty = True
+        self.flush()
+
+    def get_ttl(self, url):
+        return self.host_ttls.get(urlsplit(url).hostname, self.default_ttl)
+
+    def lookup(self, key):
+        with self.lock:
+            self.load()
+            entry = self.entries.get(key)
+            if entry is None:
+                return None, None
+            try:
+                with open(self.get_body_filepath(key), "rb") as f:
+                    content = f.read()
+            except OSError:
+                self.remove_entry(key)
+                self.dirty = True
+                return None, None
+            self.entries.move_to_end(key)
+            return dict(entry), content
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < self.get_ttl(entry["key"])
+
+    def get_conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, key, url, headers, content, encoding):
+        if len(content) > self.max_bytes:
+            return
+        with self.lock:
+            self.load()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            body_filepath = self.get_body_filepath(key)
+            tmp_filepath = f"{body_filepath}.tmp"
+            with open(tmp_filepath, "wb") as f:
+                f.write(content)
+            os.replace(tmp_filepath, body_filepath)
+            if key in self.entries:
+                self.total_bytes -= self.entries[key]["size"]
+            self.entries[key] = {
+                "key": key,
+                "url": url,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "content_type": headers.get("Content-Type"),
+                "encoding": encoding,
+                "stored_at": time.time(),
+                "size": len(content),
+            }
+            self.entries.move_to_end(key)
+            self.total_bytes += len(content)
+            self.evict()
+            self.dirty = True
+
+    def revalidated(self, key, headers):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            entry["stored_at"] = time.time()
+            entry["etag"] = headers.get("ETag") or entry["etag"]
+            entry["last_modified"] = headers.get("Last-Modified") or entry["last_modified"]
+            self.dirty = True
+
+    def evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            self.remove_entry(next(iter(self.entries)))
+
+    def remove_entry(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry["size"]
+        try:
+            os.remove(self.get_body_filepath(key))
+        except OSError:
+            pass
+
+    def get_body_filepath(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def record_hit(self):
+        with self.lock:
+            self.hits += 1
+
+    def record_miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
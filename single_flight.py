@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import Future
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+# Spelling differences that don't change what is fetched, like the case of the host, a default port,
+# the fragment or the order of the query parameters, all map to the same key.
+def normalize_url(url, params=None):
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(str(k), str(v)) for k, v in params.items()]
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(sorted(query)), ""))
+
+
+# The first caller of a key does the work, callers that ask for the same key while it is running wait
+# for it and get the same result, or the same exception. Nothing is kept once the work is done.
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.calls = 0
+        self.shared = 0
+
+    def begin(self, key):
+        with self.lock:
+            self.calls += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self.in_flight[key] = Future()
+            return future, True
+
+    def end(self, key, future, result=None, error=None):
+        with self.lock:
+            self.in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, func):
+        future, owner = self.begin(key)
+        if not owner:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            self.end(key, future, error=e)
+            raise
+        self.end(key, future, result)
+        return result
+
+    # The same for coroutines; waiting callers can be on the event loop or in other threads.
+    async def do_async(self, key, func):
+        import asyncio
+
+        future, owner = self.begin(key)
+        if not owner:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await func()
+        except BaseException as e:
+            self.end(key, future, error=e)
+            raise
+        self.end(key, future, result)
+        return result
+
+    def reset_stats(self):
+        with self.lock:
+            self.calls = 0
+            self.shared = 0
+
+    def get_stats(self):
+        with self.lock:
+            return {"calls": self.calls, "shared": self.shared}
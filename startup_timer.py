@@ -0,0 +1,150 @@
+import json
+import os
+import sys
+import threading
+import time
+
+START_TIME = time.perf_counter()
+REPORT_FILEPATH = os.path.join("configs", "startup_timings.json")
+REPORT_ENV_VAR = "ANIME_WATCH_LIST_STARTUP_REPORT"
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TimedLoader:
+    def __init__(self, loader, timer, name, is_app_module):
+        self.loader = loader
+        self.timer = timer
+        self.name = name
+        self.is_app_module = is_app_module
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.timer.begin_import(self.name, self.is_app_module)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.end_import()
+
+
+# Works like python -X importtime, but only keeps the app's own modules and the packages they import
+# directly, and reports them next to the startup marks.
+class ImportTimer:
+    def __init__(self):
+        self.local = threading.local()
+        self.records = []
+
+    def find_spec(self, name, path=None, target=None):
+        if getattr(self.local, "finding", False):
+            return None
+        self.local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self.local.finding = False
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        is_app_module = bool(spec.origin) and os.path.dirname(os.path.abspath(spec.origin)) == APP_DIR
+        spec.loader = TimedLoader(spec.loader, self, name, is_app_module)
+        return spec
+
+    def begin_import(self, name, is_app_module):
+        stack = self.get_stack()
+        parent = stack[-1] if stack else None
+        record = {
+            "name": name,
+            "app": is_app_module,
+            "depth": len([r for r in stack if r["keep"]]),
+            "keep": is_app_module or parent is None or parent["app"],
+            "start": time.perf_counter(),
+            "children": 0,
+        }
+        stack.append(record)
+
+    def end_import(self):
+        record = self.get_stack().pop()
+        cumulative = time.perf_counter() - record["start"]
+        stack = self.get_stack()
+        if stack:
+            stack[-1]["children"] += cumulative
+        if record["keep"]:
+            self.records.append(
+                {
+                    "name": record["name"],
+                    "depth": record["depth"],
+                    "self_ms": round((cumulative - record["children"]) * 1000, 1),
+                    "cumulative_ms": round(cumulative * 1000, 1),
+                }
+            )
+
+    def get_stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+
+class StartupTimer:
+    def __init__(self):
+        self.marks = {}
+        self.import_timer = None
+        if os.environ.get(REPORT_ENV_VAR):
+            self.import_timer = ImportTimer()
+            sys.meta_path.insert(0, self.import_timer)
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = round((time.perf_counter() - START_TIME) * 1000, 1)
+
+    def get_marks(self):
+        return dict(self.marks)
+
+    def to_json(self):
+        imports = self.import_timer.records if self.import_timer else []
+        return {"marks": self.get_marks(), "imports": imports}
+
+    def save(self, filepath=REPORT_FILEPATH):
+        try:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            with open(filepath, "w") as f:
+                json.dump(self.to_json(), f, indent=4)
+        except OSError as e:
+            print(f"Error saving the startup timings: {e}")
+
+    def get_report_lines(self):
+        lines = [f"{name:<24} {ms:>8.1f}ms" for name, ms in self.marks.items()]
+        if self.import_timer:
+            lines += ["", f'{"self":>9} {"cumulative":>11}  module']
+            for record in self.import_timer.records:
+                indent = "  " * record["depth"]
+                lines.append(
+                    f'{record["self_ms"]:>7.1f}ms {record["cumulative_ms"]:>9.1f}ms  {indent}{record["name"]}'
+                )
+        return lines
+
+    # Called once the first window is painted: the marks are saved on every start, the full report
+    # is only printed when the app was started with the report environment variable set.
+    def report(self):
+        self.save()
+        if self.import_timer:
+            sys.meta_path.remove(self.import_timer)
+            print("\n".join(self.get_report_lines()))
+
+
+# Created on import rather than on first use, so importing this module first starts the clock and,
+# when enabled, the import timer before anything else is loaded.
+_timer = StartupTimer()
+
+
+def get_startup_timer():
+    return _timer
@@ -0,0 +1,134 @@
+import tkinter as tk
+from tkinter import filedialog
+
+from gui_utils import GuiUtils
+from refresh_timings import format_duration, get_bucket_labels
+from startup_timer import get_startup_timer
+
+
+class StatsGUI(GuiUtils):
+    def __init__(self, generator, top_n=10):
+        super().__init__(__file__)
+        self.generator = generator
+        self.top_n = top_n
+        self.create_gui()
+        self.mainloop()
+
+    def create_gui(self):
+        bg_color = self.get_color("background_color")
+        sec_bg_color = self.get_color("secondary_background_color")
+        text_color = self.get_color("text_color")
+        self.top = tk.Toplevel(bg=sec_bg_color)
+        self.top.geometry(self.get_geometry())
+        self.top.title("Stats")
+        self.top.wm_protocol("WM_DELETE_WINDOW", self.on_close)
+        self.top.focus()
+        self.add_icon(self.top)
+
+        body_frame = tk.Frame(self.top, bg=sec_bg_color)
+        body_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        self.stats_text = tk.Text(
+            body_frame, wrap="none", width=120, height=35, font=("consolas", 10), bg=bg_color, fg=text_color
+        )
+        scrollbar = tk.Scrollbar(body_frame, command=self.stats_text.yview)
+        self.stats_text.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.stats_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        backoff_frame = tk.Frame(self.top, bg=sec_bg_color)
+        backoff_frame.pack(padx=10, pady=(0, 10), fill=tk.X)
+        self.backoff_listbox = tk.Listbox(
+            backoff_frame, height=5, selectmode=tk.EXTENDED, font=("consolas", 10), bg=bg_color, fg=text_color
+        )
+        self.backoff_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        buttons_frame = tk.Frame(self.top, bg=sec_bg_color)
+        buttons_frame.pack(pady=(0, 10))
+        buttons = [
+            ("Clear selected backoff", self.on_clear_selected_backoff),
+            ("Clear all backoff", self.on_clear_all_backoff),
+            ("Export timings as JSON", self.on_export),
+        ]
+        for text, command in buttons:
+            button = tk.Button(
+                buttons_frame,
+                text=text,
+                font=("calibri", 12),
+                bg=self.get_color("button_color"),
+                fg=text_color,
+                command=command,
+            )
+            button.pack(side=tk.LEFT, padx=5)
+        self.refresh()
+
+    def refresh(self):
+        self.backoff_urls = [entry["url"] for entry in self.generator.get_backoff_entries()]
+        self.backoff_listbox.delete(0, tk.END)
+        for url in self.backoff_urls:
+            self.backoff_listbox.insert(tk.END, url)
+        self.stats_text.config(state=tk.NORMAL)
+        self.stats_text.delete("1.0", tk.END)
+        self.stats_text.insert("1.0", self.get_stats_text())
+        self.stats_text.config(state=tk.DISABLED)
+
+    def get_stats_text(self):
+        stats = self.generator.get_stats()
+        timings = self.generator.get_timings(self.top_n)
+        lines = [f'{k.capitalize().replace("_", " ")}: {v}' for k, v in stats.items()]
+        marks = get_startup_timer().get_marks()
+        if marks:
+            lines += [
+                "",
+                "Startup: " + ", ".join(f'{name.replace("_", " ")} {ms:.0f}ms' for name, ms in marks.items()),
+            ]
+        lines += ["", f"Slowest {self.top_n} entries:"]
+        for entry in timings["slowest"]:
+            phases = ", ".join(f"{phase} {duration:.3f}s" for phase, duration in entry["phases"].items())
+            lines.append(f'{entry["total"]:8.3f}s  #{entry["index"] + 1} {entry["url"]}')
+            lines.append(f"           {phases}")
+        lines += ["", "Failing URLs in backoff:"]
+        for entry in self.generator.get_backoff_entries():
+            lines.append(
+                f'{format_duration(entry["retry_in"]):>8} until retry  {entry["error"]["class"]:<10} '
+                f'x{entry["failures"]:<3} {entry["url"]}'
+            )
+            lines.append(f'           {entry["error"]["message"]}')
+        labels = get_bucket_labels()
+        lines += ["", "Per host and phase:"]
+        lines.append(
+            f'{"host":<20} {"phase":<13} {"count":>6} {"total":>9} {"p50":>8} {"p95":>8} {"max":>8}  '
+            + " ".join(f"{label:>7}" for label in labels)
+        )
+        for h in timings["histograms"]:
+            lines.append(
+                f'{h["host"][:20]:<20} {h["phase"]:<13} {h["count"]:>6} {h["total"]:>8.3f}s {h["p50"]:>7.3f}s '
+                f'{h["p95"]:>7.3f}s {h["max"]:>7.3f}s  ' + " ".join(f'{h["buckets"][label]:>7}' for label in labels)
+            )
+        return "\n".join(lines)
+
+    def on_clear_selected_backoff(self):
+        for position in self.backoff_listbox.curselection():
+            self.generator.clear_backoff(self.backoff_urls[position])
+        self.refresh()
+
+    def on_clear_all_backoff(self):
+        self.generator.clear_backoff()
+        self.refresh()
+
+    def on_export(self):
+        filepath = filedialog.asksaveasfilename(
+            parent=self.top,
+            title="Export timings",
+            defaultextension=".json",
+            initialfile="timings.json",
+            filetypes=[("JSON", "*.json")],
+        )
+        if filepath:
+            self.generator.export_timings(filepath, self.top_n)
+
+    def on_close(self):
+        self.set_geometry(self.top.geometry())
+        self.top.destroy()
+
+    def mainloop(self):
+        tk.mainloop()
@@ -0,0 +1,77 @@
+import threading
+import tkinter as tk
+import weakref
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+# Maps every themed widget to the options that follow a theme color, e.g. {"bg": "background_color"}.
+# Widgets are only weakly referenced, so rows and windows that are thrown away drop out on their own,
+# and binding the same option of a widget again replaces the binding instead of adding another one.
+class ThemeRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bindings = weakref.WeakKeyDictionary()
+        self.colors = {}
+
+    def bind(self, widget, **options):
+        with self.lock:
+            self.bindings.setdefault(widget, {}).update(options)
+
+    def unbind(self, widget, *options):
+        with self.lock:
+            bound = self.bindings.get(widget, {})
+            for option in options:
+                bound.pop(option, None)
+
+    # Every live widget is configured once with all of its changed options; widgets that were
+    # destroyed but are still referenced somewhere fail to configure and are dropped.
+    def apply(self, colors):
+        with self.lock:
+            self.colors.update(colors)
+            bindings = list(self.bindings.items())
+        dead = []
+        for widget, options in bindings:
+            changes = {option: colors[key] for option, key in options.items() if key in colors}
+            if not changes:
+                continue
+            try:
+                widget.config(**changes)
+            except tk.TclError:
+                dead.append(widget)
+        with self.lock:
+            for widget in dead:
+                self.bindings.pop(widget, None)
+
+    # The color last applied for a key, for widgets that only follow the theme some of the time.
+    def get_color(self, key, default):
+        with self.lock:
+            return self.colors.get(key, default)
+
+    def prune(self):
+        with self.lock:
+            widgets = list(self.bindings.keys())
+        dead = []
+        for widget in widgets:
+            try:
+                if not widget.winfo_exists():
+                    dead.append(widget)
+            except tk.TclError:
+                dead.append(widget)
+        with self.lock:
+            for widget in dead:
+                self.bindings.pop(widget, None)
+
+    def get_count(self):
+        with self.lock:
+            return len(self.bindings)
+
+
+def get_theme_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ThemeRegistry()
+    return _registry
@@ -0,0 +1,90 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from image_store import get_image_store
+
+THUMBNAILS_DIR = os.path.join("configs", "thumbnails")
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class ThumbnailCache:
+    def __init__(self, thumbnails_dir=THUMBNAILS_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.thumbnails_dir = thumbnails_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.images = OrderedDict()
+        self.total_bytes = 0
+
+    def get(self, image_hash, width, height):
+        key = (image_hash, width, height)
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                return self.images[key]
+        img = self.load(image_hash, width, height)
+        self.add(key, img)
+        return img
+
+    # Covers ingested by this version already have their thumbnails written, older ones are resized
+    # the first time they are shown.
+    def load(self, image_hash, width, height):
+        from PIL import Image
+
+        filepath = self.get_filepath(image_hash, width, height)
+        if os.path.exists(filepath):
+            img = Image.open(filepath)
+            img.load()
+            return img
+        return self.put(image_hash, Image.open(io.BytesIO(get_image_store().get(image_hash))), width, height)
+
+    def put(self, image_hash, img, width, height):
+        from PIL import Image
+
+        img = img.resize((width, height), Image.LANCZOS)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        filepath = self.get_filepath(image_hash, width, height)
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
+        tmp_filepath = f"{filepath}.{threading.get_ident()}.tmp"
+        img.save(tmp_filepath, format="PNG")
+        os.replace(tmp_filepath, filepath)
+        return img
+
+    def add(self, key, img):
+        size = img.width * img.height * len(img.getbands())
+        with self.lock:
+            if key in self.images:
+                return
+            self.images[key] = img
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self.images) > 1:
+                _, evicted = self.images.popitem(last=False)
+                self.total_bytes -= evicted.width * evicted.height * len(evicted.getbands())
+
+    def prune(self):
+        if not os.path.isdir(self.thumbnails_dir):
+            return
+        store = get_image_store()
+        for filename in os.listdir(self.thumbnails_dir):
+            if not store.exists(filename.split("_")[0]):
+                try:
+                    os.remove(os.path.join(self.thumbnails_dir, filename))
+                except OSError:
+                    pass
+
+    def get_filepath(self, image_hash, width, height):
+        return os.path.join(self.thumbnails_dir, f"{image_hash}_{width}x{height}.png")
+
+
+def get_thumbnail_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ThumbnailCache()
+    return _cache
@@ -0,0 +1,77 @@
+import threading
+from functools import lru_cache
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from generic_parser import GenericParser
+
+# Parser modules are only imported the first time a URL of one of their domains is routed, so
+# sites that are not in the list never get loaded. The domains must match each class's DOMAINS.
+PARSER_MODULES = [
+    ("animeheaven_parser", "AnimeheavenParser", ["animeheaven"]),
+    ("anitaku_parser", "AnitakuParser", ["gogoanime", "gogoanimes", "anitaku"]),
+    ("hianime_parser", "HiAnimeParser", ["hianime"]),
+]
+MEMO_SIZE = 4096
+
+_router = None
+_router_lock = threading.Lock()
+
+
+class UrlRouter:
+    def __init__(self, fallback_parser_class=GenericParser):
+        self.lock = threading.RLock()
+        self.routes = {}
+        self.lazy_routes = {}
+        self.parsers = {}
+        self.fallback = fallback_parser_class()
+        self.get_parser_for_host = lru_cache(maxsize=MEMO_SIZE)(self.find_parser_for_host)
+        self.get_cache_key = lru_cache(maxsize=MEMO_SIZE)(self.build_cache_key)
+
+    def register(self, parser_class, domains=None):
+        with self.lock:
+            self.add_routes(parser_class, domains)
+            self.get_parser_for_host.cache_clear()
+            self.get_cache_key.cache_clear()
+
+    def register_lazy(self, module_name, class_name, domains):
+        with self.lock:
+            for domain in domains:
+                self.lazy_routes[domain] = (module_name, class_name)
+
+    def add_routes(self, parser_class, domains=None):
+        if parser_class not in self.parsers:
+            self.parsers[parser_class] = parser_class()
+        for domain in domains or parser_class.DOMAINS:
+            self.routes[domain] = self.parsers[parser_class]
+            self.lazy_routes.pop(domain, None)
+
+    def find_parser_for_host(self, host):
+        domain = host.split(".")[0]
+        with self.lock:
+            if domain in self.lazy_routes:
+                module_name, class_name = self.lazy_routes[domain]
+                self.add_routes(getattr(import_module(module_name), class_name))
+            return self.routes.get(domain, self.fallback)
+
+    def get_parser(self, url):
+        return self.get_parser_for_host(urlsplit(url).netloc)
+
+    def build_cache_key(self, url):
+        return self.get_parser(url).get_cache_key(url)
+
+
+def get_url_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                router = UrlRouter()
+                for module_name, class_name, domains in PARSER_MODULES:
+                    router.register_lazy(module_name, class_name, domains)
+                _router = router
+    return _router
+
+
+def register_parser(parser_class, domains=None):
+    get_url_router().register(parser_class, domains)
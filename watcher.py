@@ -0,0 +1,138 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+
+from config_generator import CONFIG_DIR
+
+DEFAULT_INTERVAL = 15 * 60
+EVENTS_FILEPATH = os.path.join(CONFIG_DIR, "new_episodes.ndjson")
+
+
+class FileEventSink:
+    def __init__(self, filepath=EVENTS_FILEPATH):
+        self.filepath = filepath
+        self.lock = threading.Lock()
+
+    # Every event is appended as a single line, so other programs can tail the file while it grows.
+    def emit(self, event):
+        with self.lock:
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.filepath, "a") as f:
+                f.write(f"{json.dumps(event)}\n")
+
+
+class DesktopNotificationSink:
+    def __init__(self, app_name="Anime Watch List"):
+        self.app_name = app_name
+        self.command = self.get_command()
+
+    def get_command(self):
+        system = platform.system()
+        if system == "Windows":
+            return ["powershell", "-NoProfile", "-Command"]
+        if system == "Darwin":
+            return ["osascript", "-e"]
+        if shutil.which("notify-send"):
+            return ["notify-send", "--app-name", self.app_name]
+        return None
+
+    def get_windows_script(self, title, message):
+        title, message = (s.replace("'", "''") for s in (title, message))
+        return (
+            "Add-Type -AssemblyName System.Windows.Forms;"
+            "$n = New-Object System.Windows.Forms.NotifyIcon;"
+            "$n.Icon = [System.Drawing.SystemIcons]::Information;"
+            "$n.Visible = $true;"
+            f"$n.ShowBalloonTip(10000, '{title}', '{message}', 'Info');"
+            "Start-Sleep -Seconds 10; $n.Dispose()"
+        )
+
+    def emit(self, event):
+        if not self.command:
+            return
+        title = f"New episode of {event['title']}"
+        message = event["next_ep_url"]
+        if self.command[0] == "powershell":
+            args = self.command + [self.get_windows_script(title, message)]
+        elif self.command[0] == "osascript":
+            args = self.command + [f"display notification {json.dumps(message)} with title {json.dumps(title)}"]
+        else:
+            args = self.command + [title, message]
+        try:
+            subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"Error showing a notification: {e}")
+
+
+# Keeps refreshing the list in one long running process, so the HTTP connections, the response and
+# episode caches, the backoff and the poll plan stay in memory between refreshes and every refresh
+# writes a fresh cache that the GUI can show as soon as it starts.
+class Watcher:
+    def __init__(self, generator, interval=DEFAULT_INTERVAL, sinks=None, after_refresh=None):
+        self.generator = generator
+        self.interval = interval
+        self.sinks = sinks or []
+        self.after_refresh = after_refresh
+        self.stop_event = threading.Event()
+        self.events = []
+        self.reported = {}
+        self.lock = threading.Lock()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self, max_refreshes=None):
+        refreshes = 0
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing the list: {e}")
+            refreshes += 1
+            if max_refreshes is not None and refreshes >= max_refreshes:
+                break
+            self.stop_event.wait(self.interval)
+
+    def refresh(self):
+        self.events = []
+        config = self.generator.get_config(on_details=self.on_details)
+        if self.after_refresh:
+            self.after_refresh(config)
+        return self.events
+
+    # Same condition the parsers use to move a row to the top (weight = 1), but only for shows that
+    # were already cached, so the first refresh of a new or cleared list doesn't report everything.
+    # Each episode is reported once, even when the same show is in the list more than once, and only the
+    # last reported episode of every show is remembered.
+    def is_new_episode(self, details):
+        if details["weight"] != 1 or not details["next_ep_url"]:
+            return False
+        cached = self.generator.cache.get(self.generator.get_cache_key(details["current_ep_url"]))
+        return bool(cached) and cached.get("next_ep_url") != details["next_ep_url"]
+
+    def on_details(self, index, details):
+        key = self.generator.get_cache_key(details["current_ep_url"])
+        with self.lock:
+            if not self.is_new_episode(details) or self.reported.get(key) == details["next_ep_url"]:
+                return
+            self.reported[key] = details["next_ep_url"]
+        event = {
+            "event": "new_episode",
+            "title": details["title"],
+            "ep": details["ep"],
+            "current_ep_url": details["current_ep_url"],
+            "next_ep_url": details["next_ep_url"],
+            "detected_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.events.append(event)
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception as e:
+                print(f"Error emitting the new episode event for {details['title']}: {e}")